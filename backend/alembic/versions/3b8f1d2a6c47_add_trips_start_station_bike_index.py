@@ -0,0 +1,26 @@
+"""Add trips start_station_id/bike_id index for station statistics
+
+Revision ID: 3b8f1d2a6c47
+Revises: c9217afd089b
+Create Date: 2026-10-15 09:12:44.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8f1d2a6c47'
+down_revision: Union[str, None] = 'c9217afd089b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_trips_start_station_bike', 'trips', ['start_station_id', 'bike_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_trips_start_station_bike', table_name='trips')
@@ -0,0 +1,6 @@
+"""
+Root pytest configuration for the CitiBike backend
+"""
+
+# Manual debug scripts that must not be imported during collection
+collect_ignore = ["test_client_debug.py"]
@@ -7,7 +7,7 @@ import logging
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 from dotenv import load_dotenv
-from prob_calc import calculate_probability
+from prob_calc import calculate_probability, format_confidence_interval
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -186,7 +186,7 @@ async def calculate_probability_endpoint(request: ProbabilityRequest, db: Sessio
         
         return ProbabilityResponse(
             probability=result['probability'],
-            confidence_interval=result['confidence_interval'],
+            confidence_interval=format_confidence_interval(result['confidence_interval']),
             explanation=result['explanation'],
             station_info=result.get('station_info')
         )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, TIMESTAMP
+from sqlalchemy import Column, Integer, String, DECIMAL, TIMESTAMP, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -20,6 +20,10 @@ class Trip(Base):
     started_at = Column(TIMESTAMP, nullable=False)
     ended_at = Column(TIMESTAMP, nullable=False)
 
+    __table_args__ = (
+        Index('idx_trips_start_station_bike', 'start_station_id', 'bike_id'),
+    )
+
 class StationMapping(Base):
     __tablename__ = 'station_mapping'
     uuid_station_id = Column(String(50), primary_key=True)
@@ -10,6 +10,35 @@ import os
 
 logger = logging.getLogger(__name__)
 
+# Characters allowed in a standard UUID string
+_UUID_CHARS = frozenset("0123456789abcdefABCDEF-")
+
+# Weekdays have more consistent patterns, weekends more random ones
+TIME_PATTERN_MULTIPLIERS = {"weekday": 1.2, "weekend": 0.8, "both": 1.0}
+
+def encounter_probability_kernel(total_trips, unique_bikes, return_rate, riding_frequency, time_multiplier):
+    """
+    Core encounter probability arithmetic, free of database and dict access.
+    
+    Every argument may be a scalar or a NumPy array; arrays are combined elementwise.
+    unique_bikes must be non-zero.
+    """
+    # Calculate bike turnover rate
+    bike_turnover_rate = np.divide(total_trips, unique_bikes)
+    
+    # Base probability (simplified model)
+    base_probability = np.minimum(0.3, bike_turnover_rate / 1000)  # Cap at 30%
+    
+    # Adjust for riding frequency
+    frequency_multiplier = np.minimum(2.0, np.divide(riding_frequency, 5))  # Normalize to 5 rides/week
+    
+    # Adjust for bike return rate
+    return_rate_multiplier = 1 + (np.asarray(return_rate, dtype=np.float64) * 2)  # Boost if bikes return
+    
+    # Calculate final probability and ensure it is between 0 and 1
+    probability = base_probability * frequency_multiplier * return_rate_multiplier * time_multiplier
+    return np.clip(probability, 0.0, 1.0)
+
 class CitiBikeProbabilityCalculator:
     """
     Calculates the probability of encountering the same CitiBike twice
@@ -20,9 +49,14 @@ class CitiBikeProbabilityCalculator:
         self.db_session = db_session
         self.station_stats = {}
         self.bike_movement_patterns = {}
+        self._name_to_uuid = None
+        self._uuid_to_numeric = None
+        
+    def load_station_statistics(self, refresh: bool = False) -> Dict:
+        """Load station statistics from database, reusing the cached result unless refresh is True"""
+        if self.station_stats and not refresh:
+            return self.station_stats
         
-    def load_station_statistics(self) -> Dict:
-        """Load station statistics from database"""
         logger.info("Starting load_station_statistics")
         try:
             # Detect database type and use appropriate SQL
@@ -36,45 +70,52 @@ class CitiBikeProbabilityCalculator:
                 # SQLite-specific syntax
                 duration_calc = "(julianday(t.ended_at) - julianday(t.started_at)) * 24 * 60"
             
+            # Aggregate trips per start station first, then join the per-station totals onto stations
             query = text(f"""
                 SELECT 
                     s.station_id,
                     s.name,
                     s.latitude,
                     s.longitude,
-                    COUNT(t.id) as total_trips,
-                    COUNT(DISTINCT t.bike_id) as unique_bikes,
-                    AVG(
-                        CASE 
-                            WHEN t.ended_at IS NOT NULL AND t.started_at IS NOT NULL 
-                            THEN {duration_calc}
-                            ELSE 0 
-                        END
-                    ) as avg_trip_duration
+                    COALESCE(ts.total_trips, 0) as total_trips,
+                    COALESCE(ts.unique_bikes, 0) as unique_bikes,
+                    COALESCE(ts.avg_trip_duration, 0) as avg_trip_duration
                 FROM stations s
                 LEFT JOIN station_mapping sm ON s.station_id = sm.uuid_station_id
-                LEFT JOIN trips t ON sm.numeric_station_id = t.start_station_id
-                GROUP BY s.station_id, s.name, s.latitude, s.longitude
+                LEFT JOIN (
+                    SELECT 
+                        t.start_station_id,
+                        COUNT(*) as total_trips,
+                        COUNT(DISTINCT t.bike_id) as unique_bikes,
+                        AVG(
+                            CASE 
+                                WHEN t.ended_at IS NOT NULL AND t.started_at IS NOT NULL 
+                                THEN {duration_calc}
+                                ELSE 0 
+                            END
+                        ) as avg_trip_duration
+                    FROM trips t
+                    GROUP BY t.start_station_id
+                ) ts ON sm.numeric_station_id = ts.start_station_id
                 ORDER BY total_trips DESC
             """)
             
             logger.info("Executing station statistics query")
             result = self.db_session.execute(query)
-            stations = []
             
-            for row in result:
-                stations.append({
+            self.station_stats = {
+                row.station_id: {
                     'station_id': row.station_id,
                     'name': row.name,
                     'latitude': float(row.latitude),
                     'longitude': float(row.longitude),
-                    'total_trips': row.total_trips or 0,
-                    'unique_bikes': row.unique_bikes or 0,
-                    'avg_trip_duration': row.avg_trip_duration or 0
-                })
-            
-            self.station_stats = {s['station_id']: s for s in stations}
-            logger.info(f"Loaded statistics for {len(stations)} stations")
+                    'total_trips': row.total_trips,
+                    'unique_bikes': row.unique_bikes,
+                    'avg_trip_duration': row.avg_trip_duration
+                }
+                for row in result
+            }
+            logger.info(f"Loaded statistics for {len(self.station_stats)} stations")
             logger.info(f"Sample station IDs: {list(self.station_stats.keys())[:5]}")
             return self.station_stats
             
@@ -82,30 +123,49 @@ class CitiBikeProbabilityCalculator:
             logger.error(f"Error loading station statistics: {e}")
             return {}
     
+    def _load_station_mapping(self) -> None:
+        """Load the station_mapping table once into name -> UUID and UUID -> numeric ID lookups"""
+        if self._name_to_uuid is not None:
+            return
+        
+        logger.info("Loading station mapping")
+        result = self.db_session.execute(text("""
+            SELECT uuid_station_id, numeric_station_id, station_name
+            FROM station_mapping
+        """))
+        
+        name_to_uuid = {}
+        uuid_to_numeric = {}
+        for row in result:
+            name_to_uuid[row.station_name] = row.uuid_station_id
+            uuid_to_numeric[row.uuid_station_id] = row.numeric_station_id
+        
+        self._name_to_uuid = name_to_uuid
+        self._uuid_to_numeric = uuid_to_numeric
+        logger.info(f"Loaded {len(uuid_to_numeric)} station mappings")
+    
     def get_uuid_by_station_name(self, station_name: str) -> str:
         """Look up UUID station ID by station name"""
         logger.info(f"Looking up UUID for station name: {station_name}")
         try:
-            query = text("""
-                SELECT uuid_station_id 
-                FROM station_mapping 
-                WHERE station_name = :station_name
-            """)
-            
-            result = self.db_session.execute(query, {'station_name': station_name})
-            row = result.fetchone()
-            
-            if row:
-                uuid_station_id = row.uuid_station_id
-                logger.info(f"Found UUID {uuid_station_id} for station name {station_name}")
-                return uuid_station_id
-            else:
-                logger.error(f"No UUID found for station name: {station_name}")
-                raise ValueError(f"Station '{station_name}' not found in database")
-                
+            self._load_station_mapping()
         except Exception as e:
             logger.error(f"Error looking up UUID for station name {station_name}: {e}")
             raise
+        
+        try:
+            uuid_station_id = self._name_to_uuid[station_name]
+        except KeyError:
+            logger.error(f"No UUID found for station name: {station_name}")
+            raise ValueError(f"Station '{station_name}' not found in database")
+        
+        logger.info(f"Found UUID {uuid_station_id} for station name {station_name}")
+        return uuid_station_id
+    
+    def _get_numeric_station_id(self, station_id: str) -> Optional[str]:
+        """Look up the numeric station ID used in trips for a UUID station ID"""
+        self._load_station_mapping()
+        return self._uuid_to_numeric.get(station_id)
     
     def is_uuid_format(self, station_id: str) -> bool:
         """
@@ -126,14 +186,16 @@ class CitiBikeProbabilityCalculator:
         if station_id.startswith("test-uuid-") and station_id.count('-') == 2:
             return True
         
-        # Check standard UUID format
-        if len(station_id) == 36 and station_id.count('-') == 4:
-            # Additional check: ensure hyphens are in correct positions
-            parts = station_id.split('-')
-            if len(parts) == 5 and len(parts[0]) == 8 and len(parts[1]) == 4 and len(parts[2]) == 4 and len(parts[3]) == 4 and len(parts[4]) == 12:
-                return True
-        
-        return False
+        # Check standard UUID format: hyphens at fixed positions, hex digits everywhere else
+        return (
+            len(station_id) == 36
+            and station_id[8] == '-'
+            and station_id[13] == '-'
+            and station_id[18] == '-'
+            and station_id[23] == '-'
+            and station_id.count('-') == 4
+            and _UUID_CHARS.issuperset(station_id)
+        )
     
     def calculate_bike_movement_probability(self, home_station_id: str, 
                                           riding_frequency: int,
@@ -149,10 +211,32 @@ class CitiBikeProbabilityCalculator:
         Returns:
             Dictionary with probability calculation results
         """
-        logger.info(f"Starting probability calculation for station {home_station_id}, frequency {riding_frequency}, pattern {time_pattern}")
+        return self.calculate_bike_movement_probability_batch(
+            home_station_id, [riding_frequency], time_pattern
+        )[0]
+    
+    def calculate_bike_movement_probability_batch(self, home_station_id: str,
+                                                riding_frequencies: List[int],
+                                                time_pattern: str) -> List[Dict]:
+        """
+        Calculate encounter probabilities for several riding frequencies at one station
+        
+        Station lookup, statistics and bike movement patterns are loaded once and the
+        probabilities for all frequencies are computed in a single vectorized pass.
+        
+        Args:
+            home_station_id: User's primary station (can be station name or UUID)
+            riding_frequencies: Numbers of rides per week to evaluate
+            time_pattern: "weekday", "weekend", or "both"
+            
+        Returns:
+            List of result dictionaries, one per riding frequency, in input order
+        """
+        riding_frequencies = list(riding_frequencies)
+        logger.info(f"Starting probability calculation for station {home_station_id}, frequencies {riding_frequencies}, pattern {time_pattern}")
         
         # Input validation
-        if riding_frequency <= 0:
+        if any(riding_frequency <= 0 for riding_frequency in riding_frequencies):
             raise ValueError("Riding frequency must be a positive number")
         
         valid_time_patterns = ["weekday", "weekend", "both"]
@@ -189,32 +273,32 @@ class CitiBikeProbabilityCalculator:
             bike_patterns = self._get_bike_movement_patterns(uuid_station_id, time_pattern)
             logger.info(f"Bike patterns: {bike_patterns}")
             
-            # Calculate probability using multiple factors
+            # Calculate probabilities for every frequency at once using multiple factors
             logger.info("Calculating encounter probability")
-            probability = self._calculate_encounter_probability(
-                home_station, bike_patterns, riding_frequency, time_pattern
+            probabilities = self._calculate_encounter_probability(
+                home_station, bike_patterns, np.asarray(riding_frequencies, dtype=np.float64), time_pattern
             )
-            logger.info(f"Calculated probability: {probability}")
-            
-            # Calculate confidence interval
-            logger.info("Calculating confidence interval")
-            confidence_interval = self._calculate_confidence_interval(probability, home_station)
+            logger.info(f"Calculated probabilities: {probabilities}")
             
-            # Generate explanation
-            logger.info("Generating explanation")
-            explanation = self._generate_explanation(
-                probability, home_station, bike_patterns, riding_frequency, time_pattern
-            )
-            
-            result = {
-                'probability': probability,
-                'confidence_interval': confidence_interval,
-                'explanation': explanation,
-                'station_info': home_station,
-                'bike_patterns': bike_patterns
-            }
-            logger.info(f"Final result: {result}")
-            return result
+            results = []
+            for riding_frequency, probability in zip(riding_frequencies, probabilities.tolist()):
+                # Calculate confidence interval
+                confidence_interval = self._calculate_confidence_interval(probability, home_station)
+                
+                # Generate explanation
+                explanation = self._generate_explanation(
+                    probability, home_station, bike_patterns, riding_frequency, time_pattern
+                )
+                
+                results.append({
+                    'probability': probability,
+                    'confidence_interval': confidence_interval,
+                    'explanation': explanation,
+                    'station_info': home_station,
+                    'bike_patterns': bike_patterns
+                })
+            logger.info(f"Final results: {results}")
+            return results
             
         except Exception as e:
             logger.error(f"Error calculating probability: {e}")
@@ -228,16 +312,9 @@ class CitiBikeProbabilityCalculator:
         logger.info(f"Getting bike movement patterns for station {station_id}, pattern {time_pattern}")
         try:
             # First, get the numeric station ID from the mapping table
-            mapping_query = text("""
-                SELECT numeric_station_id 
-                FROM station_mapping 
-                WHERE uuid_station_id = :station_id
-            """)
+            numeric_station_id = self._get_numeric_station_id(station_id)
             
-            mapping_result = self.db_session.execute(mapping_query, {'station_id': station_id})
-            mapping_row = mapping_result.fetchone()
-            
-            if not mapping_row:
+            if not numeric_station_id:
                 logger.error(f"No mapping found for station {station_id}")
                 return {
                     'total_bikes_analyzed': 0,
@@ -246,7 +323,6 @@ class CitiBikeProbabilityCalculator:
                     'patterns': []
                 }
             
-            numeric_station_id = mapping_row.numeric_station_id
             logger.info(f"Mapped station {station_id} to numeric ID {numeric_station_id}")
             
             # Build time filter based on pattern - PostgreSQL compatible
@@ -317,20 +393,12 @@ class CitiBikeProbabilityCalculator:
         logger.info(f"Calculating bike return rate for station {station_id}, pattern {time_pattern}")
         try:
             # First, get the numeric station ID from the mapping table
-            mapping_query = text("""
-                SELECT numeric_station_id 
-                FROM station_mapping 
-                WHERE uuid_station_id = :station_id
-            """)
-            
-            mapping_result = self.db_session.execute(mapping_query, {'station_id': station_id})
-            mapping_row = mapping_result.fetchone()
+            numeric_station_id = self._get_numeric_station_id(station_id)
             
-            if not mapping_row:
+            if not numeric_station_id:
                 logger.error(f"No mapping found for station {station_id}")
                 return 0.0
             
-            numeric_station_id = mapping_row.numeric_station_id
             logger.info(f"Mapped station {station_id} to numeric ID {numeric_station_id} for return rate calculation")
             
             time_filter = ""
@@ -373,55 +441,38 @@ class CitiBikeProbabilityCalculator:
     
     def _calculate_encounter_probability(self, home_station: Dict, 
                                        bike_patterns: Dict,
-                                       riding_frequency: int,
-                                       time_pattern: str) -> float:
+                                       riding_frequency: np.ndarray,
+                                       time_pattern: str) -> np.ndarray:
         """
         Calculate the probability of encountering the same bike twice
-        using a combination of factors:
+        for each riding frequency, using a combination of factors:
         1. Station popularity (more trips = higher chance)
         2. Bike return rate (bikes returning to station)
         3. Riding frequency (more rides = higher chance)
         4. Time pattern (weekday vs weekend patterns)
         """
+        riding_frequency = np.asarray(riding_frequency, dtype=np.float64)
         try:
             # Base probability from station popularity
             total_trips = home_station.get('total_trips', 0)
             unique_bikes = home_station.get('unique_bikes', 1)
             
             if total_trips == 0 or unique_bikes == 0:
-                return 0.0
-            
-            # Calculate bike turnover rate
-            bike_turnover_rate = total_trips / unique_bikes
-            
-            # Base probability (simplified model)
-            base_probability = min(0.3, bike_turnover_rate / 1000)  # Cap at 30%
-            
-            # Adjust for riding frequency
-            frequency_multiplier = min(2.0, riding_frequency / 5)  # Normalize to 5 rides/week
-            
-            # Adjust for bike return rate
-            return_rate = bike_patterns.get('bike_return_rate', 0.0)
-            return_rate_multiplier = 1 + (return_rate * 2)  # Boost if bikes return
-            
-            # Time pattern adjustment
-            time_multiplier = 1.0
-            if time_pattern == "weekday":
-                time_multiplier = 1.2  # Weekdays have more consistent patterns
-            elif time_pattern == "weekend":
-                time_multiplier = 0.8  # Weekends have more random patterns
-            
-            # Calculate final probability
-            probability = base_probability * frequency_multiplier * return_rate_multiplier * time_multiplier
-            
-            # Ensure probability is between 0 and 1
-            return max(0.0, min(1.0, probability))
+                return np.zeros_like(riding_frequency)
+            
+            return encounter_probability_kernel(
+                total_trips,
+                unique_bikes,
+                bike_patterns.get('bike_return_rate', 0.0),
+                riding_frequency,
+                TIME_PATTERN_MULTIPLIERS.get(time_pattern, 1.0)
+            )
             
         except Exception as e:
             logger.error(f"Error in probability calculation: {e}")
-            return 0.0
+            return np.zeros_like(riding_frequency)
     
-    def _calculate_confidence_interval(self, probability: float, home_station: Dict) -> str:
+    def _calculate_confidence_interval(self, probability: float, home_station: Dict) -> Tuple[float, float]:
         """Calculate confidence interval for the probability estimate"""
         # Simple confidence interval based on sample size
         total_trips = home_station.get('total_trips', 0)
@@ -436,8 +487,8 @@ class CitiBikeProbabilityCalculator:
         lower = max(0.0, probability - margin)
         upper = min(1.0, probability + margin)
         
-        # Return as formatted string instead of list
-        return f"{lower:.1%} to {upper:.1%}"
+        # Keep the bounds numeric; formatting happens at the API boundary
+        return lower, upper
     
     def _generate_explanation(self, probability: float, home_station: Dict,
                             bike_patterns: Dict, riding_frequency: int,
@@ -475,6 +526,11 @@ class CitiBikeProbabilityCalculator:
             logger.error(f"Error generating explanation: {e}")
             return "Unable to generate explanation due to calculation error."
 
+def format_confidence_interval(confidence_interval: Tuple[float, float]) -> str:
+    """Format a (lower, upper) confidence interval for display, e.g. "3.0% to 7.0%" """
+    lower, upper = confidence_interval
+    return f"{format(lower, '.1%')} to {format(upper, '.1%')}"
+
 def calculate_probability(db_session: Session, home_station_id: str,
                          riding_frequency: int, time_pattern: str) -> Dict:
     """
@@ -6,11 +6,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 Pytest configuration and fixtures for CitiBike backend tests
 """
 import pytest
+import csv
+import io
 import os
 import tempfile
 from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from psycopg2.extras import execute_values
 from fastapi.testclient import TestClient
 from main import app, get_db
 from models import Base
@@ -27,25 +30,42 @@ def test_database_url():
     return os.getenv("TEST_DATABASE_URL", "postgresql://localhost:5432/citibike_test")
 
 @pytest.fixture(scope="session")
-def test_engine(test_database_url):
+def test_schema():
+    """Per-worker schema when running under pytest-xdist, None for a single process run"""
+    worker_id = os.getenv("PYTEST_XDIST_WORKER", "master")
+    if worker_id == "master":
+        return None
+    return f"test_{worker_id}"
+
+@pytest.fixture(scope="session")
+def test_engine(test_database_url, test_schema):
     """Create test database engine"""
     # Always use PostgreSQL for tests (no SQLite fallback)
-    engine = create_engine(test_database_url)
+    if test_schema:
+        # Give each xdist worker its own tables so workers never truncate or drop each other's data
+        engine = create_engine(test_database_url, connect_args={"options": f"-csearch_path={test_schema}"})
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {test_schema}"))
+    else:
+        engine = create_engine(test_database_url)
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
     
     # Clean up any existing test data at session start
     with engine.connect() as conn:
-        conn.execute(text("DELETE FROM trips"))
-        conn.execute(text("DELETE FROM station_mapping"))
-        conn.execute(text("DELETE FROM stations"))
+        conn.execute(text("TRUNCATE trips, station_mapping, stations RESTART IDENTITY CASCADE"))
         conn.commit()
     
     yield engine
     
     # Cleanup
-    Base.metadata.drop_all(bind=engine)
+    if test_schema:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {test_schema} CASCADE"))
+    else:
+        Base.metadata.drop_all(bind=engine)
+    engine.dispose()
 
 @pytest.fixture(scope="function")
 def test_db_session(test_engine):
@@ -88,12 +108,8 @@ def test_client(test_db_session):
     if "ENVIRONMENT" in os.environ:
         del os.environ["ENVIRONMENT"]
 
-@pytest.fixture(scope="function")
-def probability_calculator(test_db_session):
-    """Create probability calculator instance for testing"""
-    return CitiBikeProbabilityCalculator(test_db_session)
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def sample_stations():
     """Sample station data for testing"""
     return [
@@ -117,7 +133,7 @@ def sample_stations():
         }
     ]
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def sample_trips():
     """Sample trip data for testing"""
     return [
@@ -144,7 +160,7 @@ def sample_trips():
         }
     ]
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def sample_station_mappings():
     """Sample station mapping data for testing"""
     return [
@@ -165,34 +181,74 @@ def sample_station_mappings():
         }
     ]
 
-@pytest.fixture(scope="function")
-def populated_test_db(test_db_session, sample_stations, sample_trips, sample_station_mappings):
-    """Populate test database with sample data"""
-    from models import Station, Trip, StationMapping
+@pytest.fixture(scope="module")
+def populated_test_db(test_engine, sample_stations, sample_trips, sample_station_mappings):
+    """Populate test database with sample data once per test module"""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    session = TestingSessionLocal()
     
     # Clear existing data first to prevent unique constraint violations
-    test_db_session.query(Trip).delete()
-    test_db_session.query(StationMapping).delete()
-    test_db_session.query(Station).delete()
-    test_db_session.commit()
-    
-    # Add sample stations
-    for station_data in sample_stations:
-        station = Station(**station_data)
-        test_db_session.add(station)
-    
-    # Add sample station mappings
-    for mapping_data in sample_station_mappings:
-        mapping = StationMapping(**mapping_data)
-        test_db_session.add(mapping)
+    session.execute(text("TRUNCATE trips, station_mapping, stations RESTART IDENTITY CASCADE"))
+    
+    # Bulk load through the DBAPI connection instead of constructing ORM objects
+    raw_conn = session.connection().connection
+    with raw_conn.cursor() as cur:
+        # Add sample stations
+        execute_values(
+            cur,
+            "INSERT INTO stations (station_id, name, latitude, longitude) VALUES %s",
+            [(s["station_id"], s["name"], s["latitude"], s["longitude"]) for s in sample_stations],
+            page_size=1000
+        )
+        
+        # Add sample station mappings
+        execute_values(
+            cur,
+            "INSERT INTO station_mapping (uuid_station_id, numeric_station_id, station_name) VALUES %s",
+            [(m["uuid_station_id"], m["numeric_station_id"], m["station_name"]) for m in sample_station_mappings],
+            page_size=1000
+        )
+        
+        # Add sample trips
+        buf = io.StringIO()
+        csv.writer(buf).writerows(
+            (t["bike_id"], t["start_station_id"], t["end_station_id"], t["started_at"].isoformat(), t["ended_at"].isoformat())
+            for t in sample_trips
+        )
+        buf.seek(0)
+        cur.copy_expert(
+            "COPY trips (bike_id, start_station_id, end_station_id, started_at, ended_at) FROM STDIN WITH CSV",
+            buf
+        )
+    
+    session.commit()
     
-    # Add sample trips
-    for trip_data in sample_trips:
-        trip = Trip(**trip_data)
-        test_db_session.add(trip)
+    yield session
     
-    test_db_session.commit()
+    session.rollback()
+    session.close()
+
+@pytest.fixture(scope="function")
+def db_savepoint(populated_test_db):
+    """Run a test inside a SAVEPOINT on the shared populated session and roll it back afterwards"""
+    savepoint = populated_test_db.begin_nested()
     
-    yield test_db_session
+    yield populated_test_db
     
-    # Cleanup is handled by test_db_session fixture 
\ No newline at end of file
+    if savepoint.is_active:
+        savepoint.rollback()
+
+@pytest.fixture(scope="module")
+def shared_probability_calculator(populated_test_db):
+    """Create probability calculator instance shared by a test module so station statistics load once"""
+    return CitiBikeProbabilityCalculator(populated_test_db)
+
+@pytest.fixture(scope="function")
+def probability_calculator(shared_probability_calculator, db_savepoint):
+    """Shared calculator with the test wrapped in a savepoint, so a failing query can't break later tests"""
+    return shared_probability_calculator
+
+@pytest.fixture(scope="function")
+def offline_calculator():
+    """Calculator without a database session, for logic that never queries"""
+    return CitiBikeProbabilityCalculator(None)
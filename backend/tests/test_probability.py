@@ -9,7 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from prob_calc import calculate_probability
+from prob_calc import calculate_probability, format_confidence_interval
 import logging
 
 # Configure logging
@@ -68,7 +68,7 @@ def test_probability_calculation():
                 print(f"Riding Frequency: {test_case['riding_frequency']} rides/week")
                 print(f"Time Pattern: {test_case['time_pattern']}")
                 print(f"Probability: {result['probability']:.1%}")
-                print(f"Confidence Interval: {result['confidence_interval']}")
+                print(f"Confidence Interval: {format_confidence_interval(result['confidence_interval'])}")
                 print(f"Explanation: {result['explanation']}")
                 
                 if result.get('station_info'):
@@ -3,6 +3,7 @@
 Test script to load stations and trips data into Railway PostgreSQL for full frontend testing
 """
 
+import io
 import os
 import logging
 from datetime import datetime, timedelta
@@ -12,6 +13,80 @@ from dotenv import load_dotenv
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Create bikes that return to the same stations (for realistic probability calculations)
+BIKE_PATTERNS = [
+    # Bike 1: Frequently returns to Times Square
+    {"bike_id": "BIKE001", "home_station": "test_1", "return_rate": 0.7},
+    {"bike_id": "BIKE002", "home_station": "test_1", "return_rate": 0.6},
+    {"bike_id": "BIKE003", "home_station": "test_2", "return_rate": 0.8},
+    {"bike_id": "BIKE004", "home_station": "test_2", "return_rate": 0.5},
+    {"bike_id": "BIKE005", "home_station": "test_3", "return_rate": 0.4},
+    {"bike_id": "BIKE006", "home_station": "test_3", "return_rate": 0.3},
+    {"bike_id": "BIKE007", "home_station": "test_4", "return_rate": 0.9},
+    {"bike_id": "BIKE008", "home_station": "test_5", "return_rate": 0.2},
+]
+
+class LineStream(io.RawIOBase):
+    """Read-only binary stream over an iterator of text lines, for COPY FROM STDIN"""
+    
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._pending = b""
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = next(self._lines).encode("utf-8")
+            except StopIteration:
+                return 0
+        
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+def generate_trips(bike_patterns, station_ids, base_time):
+    """Yield tab-separated trip rows in COPY text format"""
+    # Work in integer epoch seconds and only build datetimes when formatting a row
+    base_ts = int(base_time.timestamp())
+    
+    for pattern in bike_patterns:
+        bike_id = pattern["bike_id"]
+        home_station = pattern["home_station"]
+        return_rate = pattern["return_rate"]
+        other_stations = [s for s in station_ids if s != home_station]
+        
+        current_ts = base_ts
+        
+        # Generate 10-20 trips per bike over 30 days
+        num_trips = 15
+        
+        for i in range(num_trips):
+            # Start from home station
+            start_station = home_station
+            
+            # Choose destination (sometimes return to home, sometimes go elsewhere)
+            if i > 0 and i % 3 == 0 and return_rate > 0.5:  # Return to home station
+                end_station = home_station
+            else:
+                # Go to a different station
+                end_station = other_stations[i % len(other_stations)]
+            
+            # Generate realistic timestamps
+            start_ts = current_ts + i*7200 + i*900  # Every 2 hours
+            end_ts = start_ts + 900 + (i % 20)*60  # 15-35 minutes
+            
+            started_at = datetime.fromtimestamp(start_ts).isoformat()
+            ended_at = datetime.fromtimestamp(end_ts).isoformat()
+            yield f"{bike_id}\t{start_station}\t{end_station}\t{started_at}\t{ended_at}\n"
+            
+            current_ts = end_ts + 3600  # 1 hour gap between trips
+
 def create_test_data():
     """Create comprehensive test data for full frontend testing"""
     
@@ -23,44 +98,6 @@ def create_test_data():
         
         engine = create_engine(database_url)
         
-        # Create tables if they don't exist
-        with engine.connect() as conn:
-            logger.info("🏗️ Creating tables...")
-            
-            # Stations table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS stations (
-                    id SERIAL PRIMARY KEY,
-                    station_id VARCHAR(50) UNIQUE NOT NULL,
-                    name VARCHAR(255) NOT NULL,
-                    latitude DECIMAL(10, 8) NOT NULL,
-                    longitude DECIMAL(11, 8) NOT NULL
-                )
-            """))
-            
-            # Trips table
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS trips (
-                    id SERIAL PRIMARY KEY,
-                    bike_id VARCHAR(50) NOT NULL,
-                    start_station_id VARCHAR(50) NOT NULL,
-                    end_station_id VARCHAR(50) NOT NULL,
-                    started_at TIMESTAMP,
-                    ended_at TIMESTAMP
-                )
-            """))
-            
-            conn.commit()
-            logger.info("✅ Tables created successfully")
-        
-        # Clear existing data
-        with engine.connect() as conn:
-            logger.info("🧹 Clearing existing data...")
-            conn.execute(text("DELETE FROM trips"))
-            conn.execute(text("DELETE FROM stations"))
-            conn.commit()
-        
-        # Insert test stations
         test_stations = [
             {"station_id": "test_1", "name": "Times Square Station", "latitude": 40.7589, "longitude": -73.9851},
             {"station_id": "test_2", "name": "Central Park Station", "latitude": 40.7505, "longitude": -73.9934},
@@ -69,91 +106,84 @@ def create_test_data():
             {"station_id": "test_5", "name": "High Line Station", "latitude": 40.7484, "longitude": -74.0047}
         ]
         
-        with engine.connect() as conn:
-            for station in test_stations:
-                conn.execute(text("""
-                    INSERT INTO stations (station_id, name, latitude, longitude)
-                    VALUES (:station_id, :name, :latitude, :longitude)
-                """), station)
-            conn.commit()
-            logger.info(f"✅ Inserted {len(test_stations)} test stations")
-        
-        # Create realistic trip data
-        logger.info("🚲 Creating test trip data...")
-        
-        # Generate trip data with realistic patterns
-        base_time = datetime.now() - timedelta(days=30)  # Start 30 days ago
-        trips = []
-        
-        # Create bikes that return to the same stations (for realistic probability calculations)
-        bike_patterns = [
-            # Bike 1: Frequently returns to Times Square
-            {"bike_id": "BIKE001", "home_station": "test_1", "return_rate": 0.7},
-            {"bike_id": "BIKE002", "home_station": "test_1", "return_rate": 0.6},
-            {"bike_id": "BIKE003", "home_station": "test_2", "return_rate": 0.8},
-            {"bike_id": "BIKE004", "home_station": "test_2", "return_rate": 0.5},
-            {"bike_id": "BIKE005", "home_station": "test_3", "return_rate": 0.4},
-            {"bike_id": "BIKE006", "home_station": "test_3", "return_rate": 0.3},
-            {"bike_id": "BIKE007", "home_station": "test_4", "return_rate": 0.9},
-            {"bike_id": "BIKE008", "home_station": "test_5", "return_rate": 0.2},
-        ]
-        
-        # Generate trips for each bike
-        for pattern in bike_patterns:
-            bike_id = pattern["bike_id"]
-            home_station = pattern["home_station"]
-            return_rate = pattern["return_rate"]
+        # Run schema setup, load and verification in a single transaction on one connection
+        with engine.begin() as conn:
+            # Only issue DDL when the schema is missing; CREATE TABLE IF NOT EXISTS still takes a lock
+            tables_exist = conn.execute(text("""
+                SELECT to_regclass('public.stations') IS NOT NULL
+                   AND to_regclass('public.trips') IS NOT NULL
+            """)).scalar()
             
-            current_time = base_time
+            if tables_exist:
+                logger.info("✅ Tables already exist, skipping creation")
+            else:
+                logger.info("🏗️ Creating tables...")
+                
+                # Stations table
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS stations (
+                        id SERIAL PRIMARY KEY,
+                        station_id VARCHAR(50) UNIQUE NOT NULL,
+                        name VARCHAR(255) NOT NULL,
+                        latitude DECIMAL(10, 8) NOT NULL,
+                        longitude DECIMAL(11, 8) NOT NULL
+                    )
+                """))
+                
+                # Trips table
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS trips (
+                        id SERIAL PRIMARY KEY,
+                        bike_id VARCHAR(50) NOT NULL,
+                        start_station_id VARCHAR(50) NOT NULL,
+                        end_station_id VARCHAR(50) NOT NULL,
+                        started_at TIMESTAMP,
+                        ended_at TIMESTAMP
+                    )
+                """))
+                logger.info("✅ Tables created successfully")
             
-            # Generate 10-20 trips per bike over 30 days
-            num_trips = 15
+            # Clear existing data
+            logger.info("🧹 Clearing existing data...")
+            conn.execute(text("TRUNCATE trips, stations RESTART IDENTITY CASCADE"))
             
-            for i in range(num_trips):
-                # Start from home station
-                start_station = home_station
-                
-                # Choose destination (sometimes return to home, sometimes go elsewhere)
-                if i > 0 and i % 3 == 0 and return_rate > 0.5:  # Return to home station
-                    end_station = home_station
-                else:
-                    # Go to a different station
-                    other_stations = [s["station_id"] for s in test_stations if s["station_id"] != home_station]
-                    end_station = other_stations[i % len(other_stations)]
+            with conn.connection.cursor() as cur:
+                # Insert test stations
+                station_rows = "".join(
+                    f"{s['station_id']}\t{s['name']}\t{s['latitude']}\t{s['longitude']}\n"
+                    for s in test_stations
+                )
+                cur.copy_expert(
+                    "COPY stations (station_id, name, latitude, longitude) FROM STDIN",
+                    io.StringIO(station_rows)
+                )
+                logger.info(f"✅ Inserted {len(test_stations)} test stations")
                 
-                # Generate realistic timestamps
-                trip_start = current_time + timedelta(hours=i*2, minutes=i*15)  # Every 2 hours
-                trip_duration = timedelta(minutes=15 + (i % 20))  # 15-35 minutes
-                trip_end = trip_start + trip_duration
+                # Create realistic trip data
+                logger.info("🚲 Creating test trip data...")
                 
-                trips.append({
-                    "bike_id": bike_id,
-                    "start_station_id": start_station,
-                    "end_station_id": end_station,
-                    "started_at": trip_start,
-                    "ended_at": trip_end
-                })
+                # Generate trip data with realistic patterns
+                base_time = datetime.now() - timedelta(days=30)  # Start 30 days ago
+                station_ids = [s["station_id"] for s in test_stations]
                 
-                current_time = trip_end + timedelta(hours=1)  # 1 hour gap between trips
-        
-        # Insert trips in batches
-        with engine.connect() as conn:
-            batch_size = 50
-            for i in range(0, len(trips), batch_size):
-                batch = trips[i:i+batch_size]
-                for trip in batch:
-                    conn.execute(text("""
-                        INSERT INTO trips (bike_id, start_station_id, end_station_id, started_at, ended_at)
-                        VALUES (:bike_id, :start_station_id, :end_station_id, :started_at, :ended_at)
-                    """), trip)
-                conn.commit()
-                logger.info(f"✅ Inserted trips {i+1} to {min(i+batch_size, len(trips))}")
-        
-        # Verify data
-        with engine.connect() as conn:
-            station_count = conn.execute(text("SELECT COUNT(*) FROM stations")).scalar()
-            trip_count = conn.execute(text("SELECT COUNT(*) FROM trips")).scalar()
-            unique_bikes = conn.execute(text("SELECT COUNT(DISTINCT bike_id) FROM trips")).scalar()
+                # Stream generated trips straight into COPY so they are never held in memory
+                trip_stream = io.BufferedReader(
+                    LineStream(generate_trips(BIKE_PATTERNS, station_ids, base_time)),
+                    buffer_size=COPY_BUFFER_SIZE
+                )
+                cur.copy_expert("""
+                    COPY trips (bike_id, start_station_id, end_station_id, started_at, ended_at)
+                    FROM STDIN
+                """, trip_stream)
+                logger.info(f"✅ Copied {cur.rowcount} test trips")
+            
+            # Verify data
+            station_count, trip_count, unique_bikes = conn.execute(text("""
+                SELECT
+                    (SELECT COUNT(*) FROM stations),
+                    (SELECT COUNT(*) FROM trips),
+                    (SELECT COUNT(DISTINCT bike_id) FROM trips)
+            """)).one()
         
         logger.info(f"📊 Final database statistics:")
         logger.info(f"  Stations: {station_count}")
@@ -8,6 +8,7 @@ import os
 import sys
 import subprocess
 import argparse
+import importlib.util
 import time
 from pathlib import Path
 
@@ -21,36 +22,33 @@ def setup_environment():
     os.environ["TEST_DATABASE_URL"] = "postgresql://localhost:5432/citibike_test"
     os.environ["DATABASE_URL"] = "postgresql://localhost:5432/citibike_dev"
     
-    # Ensure we're in the right directory
-    project_root = Path(__file__).parent
-    os.chdir(project_root)
-    
     print("✅ Environment variables set:")
     print(f"   TESTING: {os.environ.get('TESTING')}")
     print(f"   TEST_DATABASE_URL: {os.environ.get('TEST_DATABASE_URL')}")
     print(f"   DATABASE_URL: {os.environ.get('DATABASE_URL')}")
 
+def get_test_database_url():
+    """Return the PostgreSQL URL the test suite runs against"""
+    return os.environ.get("TEST_DATABASE_URL", "postgresql://localhost:5432/citibike_test")
+
 def check_database_connection():
     """Check if PostgreSQL test database is accessible"""
     print("🔍 Checking database connection...")
     
     try:
-        # Try to connect to PostgreSQL test database
-        result = subprocess.run([
-            "psql", "-d", "citibike_test", "-c", "SELECT 1;"
-        ], capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            print("✅ PostgreSQL test database accessible")
-            return True
-        else:
-            print("❌ Cannot connect to PostgreSQL test database")
-            print("   Error:", result.stderr)
-            return False
-            
-    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
-        print(f"⚠️  PostgreSQL client not available: {e}")
-        print("   Tests will use SQLite fallback")
+        import psycopg2
+    except ImportError as e:
+        print(f"⚠️  PostgreSQL driver not available: {e}")
+        return False
+    
+    try:
+        # Open and close a connection directly instead of spawning psql
+        psycopg2.connect(get_test_database_url(), connect_timeout=2).close()
+        print("✅ PostgreSQL test database accessible")
+        return True
+    except psycopg2.OperationalError as e:
+        print("❌ Cannot connect to PostgreSQL test database")
+        print("   Error:", e)
         return False
 
 def create_test_database():
@@ -58,21 +56,38 @@ def create_test_database():
     print("📦 Creating test database...")
     
     try:
-        # Try to create the test database
-        result = subprocess.run([
-            "createdb", "citibike_test"
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ Created PostgreSQL test database 'citibike_test'")
-        else:
-            print("⚠️  Test database 'citibike_test' already exists or could not be created")
-            
-    except FileNotFoundError:
-        print("⚠️  PostgreSQL client not available, skipping database creation")
+        import psycopg2
+        from psycopg2 import sql
+        from psycopg2.extensions import parse_dsn
+    except ImportError:
+        print("⚠️  PostgreSQL driver not available, skipping database creation")
+        return
+    
+    database_url = get_test_database_url()
+    database_name = parse_dsn(database_url).get("dbname", "citibike_test")
+    
+    try:
+        # CREATE DATABASE cannot run inside a transaction, so use the maintenance DB in autocommit mode
+        conn = psycopg2.connect(database_url, dbname="postgres", connect_timeout=2)
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(database_name)))
+        finally:
+            conn.close()
+        print(f"✅ Created PostgreSQL test database '{database_name}'")
+    except psycopg2.Error:
+        print(f"⚠️  Test database '{database_name}' already exists or could not be created")
 
-def run_backend_tests(verbose=False):
-    """Run backend tests with proper setup"""
+def pytest_parallel_args():
+    """Distribute pytest across all CPUs when pytest-xdist is installed"""
+    if importlib.util.find_spec("xdist") is None:
+        return []
+    # Keep each test file on one worker so module-scoped fixtures are built once per file
+    return ["-n", "auto", "--dist", "loadfile"]
+
+def start_backend_tests(verbose=False):
+    """Launch backend tests without waiting, returning the pytest process"""
     print("=" * 50)
     print("RUNNING BACKEND TESTS")
     print("=" * 50)
@@ -83,43 +98,50 @@ def run_backend_tests(verbose=False):
     
     if not backend_dir.exists():
         print("❌ Backend directory not found")
-        return False
-    
-    # Change to backend directory
-    original_dir = os.getcwd()
-    os.chdir(backend_dir)
+        return None
     
     # Set backend-specific environment
-    os.environ["PYTHONPATH"] = str(backend_dir.absolute())
+    env = {**os.environ, "PYTHONPATH": str(backend_dir.absolute())}
     
     # Run backend tests
-    cmd = ["python", "-m", "pytest", "tests/", "-v"]
+    cmd = ["python", "-m", "pytest", "tests/", "-v"] + pytest_parallel_args()
     if verbose:
         cmd.extend(["--tb=long", "--capture=no"])
     
     try:
-        result = subprocess.run(cmd, env=os.environ, timeout=300)
-        success = result.returncode == 0
-        
-        if success:
-            print("✅ Backend tests passed")
-        else:
-            print("❌ Backend tests failed")
-            
-        return success
-        
-    except subprocess.TimeoutExpired:
-        print("❌ Backend tests timed out")
-        return False
+        return subprocess.Popen(cmd, cwd=str(backend_dir.absolute()), env=env)
     except Exception as e:
         print(f"❌ Backend tests failed with error: {e}")
+        return None
+
+def wait_backend_tests(process):
+    """Wait for a backend test process started by start_backend_tests"""
+    if process is None:
+        return False
+    
+    try:
+        process.communicate(timeout=300)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        print("❌ Backend tests timed out")
         return False
-    finally:
-        # Restore original directory
-        os.chdir(original_dir)
+    
+    success = process.returncode == 0
+    
+    if success:
+        print("✅ Backend tests passed")
+    else:
+        print("❌ Backend tests failed")
+        
+    return success
 
-def run_frontend_tests(verbose=False):
-    """Run frontend tests"""
+def run_backend_tests(verbose=False):
+    """Run backend tests with proper setup"""
+    return wait_backend_tests(start_backend_tests(verbose))
+
+def start_frontend_tests(verbose=False):
+    """Launch frontend tests without waiting, returning the jest process"""
     print("=" * 50)
     print("RUNNING FRONTEND TESTS")
     print("=" * 50)
@@ -130,70 +152,85 @@ def run_frontend_tests(verbose=False):
     
     if not frontend_dir.exists():
         print("❌ Frontend directory not found")
-        return False
-    
-    # Change to frontend directory
-    original_dir = os.getcwd()
-    os.chdir(frontend_dir)
+        return None
     
     # Check if node_modules exists
-    if not Path("node_modules").exists():
+    if not (frontend_dir / "node_modules").exists():
         print("📦 Installing frontend dependencies...")
         try:
-            subprocess.run(["npm", "install"], check=True)
+            subprocess.run(["npm", "install"], cwd=str(frontend_dir.absolute()), check=True)
         except subprocess.CalledProcessError:
             print("❌ Failed to install frontend dependencies")
-            os.chdir(original_dir)
-            return False
+            return None
     
     # Run frontend tests using npx to ensure Jest is found
+    cmd = ["npx", "jest"]
+    if verbose:
+        cmd.extend(["--verbose"])
+    
     try:
-        cmd = ["npx", "jest"]
-        if verbose:
-            cmd.extend(["--verbose"])
-            
-        result = subprocess.run(cmd, env=os.environ, timeout=300, capture_output=True, text=True)
-        success = result.returncode == 0
-        
-        if success:
-            print("✅ Frontend tests passed")
-        else:
-            print("❌ Frontend tests failed")
-            if result.stderr:
-                print(f"   Error: {result.stderr[:200]}...")
-            
-        return success
-        
+        return subprocess.Popen(
+            cmd, cwd=str(frontend_dir.absolute()), env=os.environ,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+    except Exception as e:
+        print(f"❌ Frontend tests failed with error: {e}")
+        return None
+
+def wait_frontend_tests(process):
+    """Wait for a frontend test process started by start_frontend_tests"""
+    if process is None:
+        return False
+    
+    try:
+        _, stderr = process.communicate(timeout=300)
     except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
         print("❌ Frontend tests timed out")
         return False
+    
+    success = process.returncode == 0
+    
+    if success:
+        print("✅ Frontend tests passed")
+    else:
+        print("❌ Frontend tests failed")
+        if stderr:
+            print(f"   Error: {stderr[:200]}...")
+        
+    return success
+
+def run_frontend_tests(verbose=False):
+    """Run frontend tests"""
+    return wait_frontend_tests(start_frontend_tests(verbose))
+
+def check_backend_health():
+    """Probe the backend health endpoint once"""
+    try:
+        import requests
+        response = requests.get("http://localhost:8000/api/health", timeout=5)
+        if response.status_code == 200:
+            print("✅ Backend server is running")
+            return True
+        print("❌ Backend server is not responding correctly")
+        return False
     except Exception as e:
-        print(f"❌ Frontend tests failed with error: {e}")
+        print(f"❌ Backend server is not running: {e}")
+        print("   Start the backend server first: cd backend && python main.py")
         return False
-    finally:
-        # Restore original directory
-        os.chdir(original_dir)
 
-def run_integration_tests(verbose=False):
+def run_integration_tests(verbose=False, backend_healthy=None):
     """Run integration tests"""
     print("=" * 50)
     print("RUNNING INTEGRATION TESTS")
     print("=" * 50)
     
     # Check if backend is running
-    try:
-        import requests
-        response = requests.get("http://localhost:8000/api/health", timeout=5)
-        if response.status_code == 200:
-            print("✅ Backend server is running")
-        else:
-            print("❌ Backend server is not responding correctly")
-            print("⚠️  Skipping integration tests (backend not available)")
-            return True  # Skip gracefully
-    except Exception as e:
-        print(f"❌ Backend server is not running: {e}")
+    if backend_healthy is None:
+        backend_healthy = check_backend_health()
+    if not backend_healthy:
         print("⚠️  Skipping integration tests (backend not available)")
-        print("   Start the backend server first: cd backend && python main.py")
         return True  # Skip gracefully
     
     # Check if integration test directory exists
@@ -207,14 +244,11 @@ def run_integration_tests(verbose=False):
     
     # Run integration tests
     try:
-        original_dir = os.getcwd()
-        os.chdir(project_root / "backend")
-        
         cmd = ["python", "-m", "pytest", "tests/integration/", "-v"]
         if verbose:
             cmd.extend(["--tb=long", "--capture=no"])
             
-        result = subprocess.run(cmd, env=os.environ, timeout=300)
+        result = subprocess.run(cmd, cwd=str((project_root / "backend").absolute()), env=os.environ, timeout=300)
         success = result.returncode == 0
         
         if success:
@@ -230,9 +264,6 @@ def run_integration_tests(verbose=False):
     except Exception as e:
         print(f"❌ Integration tests failed with error: {e}")
         return False
-    finally:
-        # Restore original directory
-        os.chdir(original_dir)
 
 def run_database_tests(verbose=False):
     """Run database-specific tests"""
@@ -248,17 +279,13 @@ def run_database_tests(verbose=False):
         print("❌ Backend directory not found")
         return False
     
-    # Change to backend directory
-    original_dir = os.getcwd()
-    os.chdir(backend_dir)
-    
     # Run database tests (look for tests with database marker)
     try:
         cmd = ["python", "-m", "pytest", "tests/", "-m", "database", "-v"]
         if verbose:
             cmd.extend(["--tb=long", "--capture=no"])
             
-        result = subprocess.run(cmd, env=os.environ, timeout=300, capture_output=True, text=True)
+        result = subprocess.run(cmd, cwd=str(backend_dir.absolute()), env=os.environ, timeout=300, capture_output=True, text=True)
         
         # If no tests found with database marker, that's okay
         if result.stdout and ("no tests ran" in result.stdout or "collected 0 items" in result.stdout):
@@ -280,30 +307,18 @@ def run_database_tests(verbose=False):
     except Exception as e:
         print(f"❌ Database tests failed with error: {e}")
         return False
-    finally:
-        # Restore original directory
-        os.chdir(original_dir)
 
-def run_performance_tests(verbose=False):
+def run_performance_tests(verbose=False, backend_healthy=None):
     """Run performance tests"""
     print("=" * 50)
     print("RUNNING PERFORMANCE TESTS")
     print("=" * 50)
     
     # Check if backend is running
-    try:
-        import requests
-        response = requests.get("http://localhost:8000/api/health", timeout=5)
-        if response.status_code == 200:
-            print("✅ Backend server is running")
-        else:
-            print("❌ Backend server is not responding correctly")
-            print("⚠️  Skipping performance tests (backend not available)")
-            return True  # Skip gracefully
-    except Exception as e:
-        print(f"❌ Backend server is not running: {e}")
+    if backend_healthy is None:
+        backend_healthy = check_backend_health()
+    if not backend_healthy:
         print("⚠️  Skipping performance tests (backend not available)")
-        print("   Start the backend server first: cd backend && python main.py")
         return True  # Skip gracefully
     
     # Get project root and backend directory
@@ -314,17 +329,13 @@ def run_performance_tests(verbose=False):
         print("❌ Backend directory not found")
         return False
     
-    # Change to backend directory
-    original_dir = os.getcwd()
-    os.chdir(backend_dir)
-    
     # Run performance tests (look for tests with slow marker)
     try:
         cmd = ["python", "-m", "pytest", "tests/", "-m", "slow", "-v"]
         if verbose:
             cmd.extend(["--tb=long", "--capture=no"])
             
-        result = subprocess.run(cmd, env=os.environ, timeout=600, capture_output=True, text=True)  # 10 minutes for performance tests
+        result = subprocess.run(cmd, cwd=str(backend_dir.absolute()), env=os.environ, timeout=600, capture_output=True, text=True)  # 10 minutes for performance tests
         
         # If no tests found with slow marker, that's okay
         if result.stdout and ("no tests ran" in result.stdout or "collected 0 items" in result.stdout):
@@ -346,9 +357,6 @@ def run_performance_tests(verbose=False):
     except Exception as e:
         print(f"❌ Performance tests failed with error: {e}")
         return False
-    finally:
-        # Restore original directory
-        os.chdir(original_dir)
 
 def main():
     parser = argparse.ArgumentParser(description="Run CitiBike test suite")
@@ -384,12 +392,17 @@ def main():
     elif args.performance_only:
         results["performance"] = run_performance_tests(args.verbose)
     else:
-        # Run all tests
-        results["backend"] = run_backend_tests(args.verbose)
-        results["frontend"] = run_frontend_tests(args.verbose)
-        results["integration"] = run_integration_tests(args.verbose)
-        results["database"] = run_database_tests(args.verbose)
-        results["performance"] = run_performance_tests(args.verbose)
+        # Run all tests; backend and frontend suites are independent, so run them concurrently
+        backend_process = start_backend_tests(args.verbose)
+        frontend_process = start_frontend_tests(args.verbose)
+        results["backend"] = wait_backend_tests(backend_process)
+        results["frontend"] = wait_frontend_tests(frontend_process)
+        # Probe the backend once; a missing requests package just skips integration
+        backend_healthy = check_backend_health()
+        
+        # The backend run already collected every test under tests/, including the database and
+        # slow markers, so those suites are not collected and run a second time here
+        results["integration"] = run_integration_tests(args.verbose, backend_healthy)
     
     # Print summary
     print("=" * 50)
@@ -6,37 +6,39 @@ Uses bulk inserts and optimized processing for much faster loading
 
 import os
 import sys
+import csv
+import io
 import logging
 import json
 import zipfile
-import pandas as pd
+from psycopg2 import sql
+from psycopg2.extras import execute_values
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import time
-from io import StringIO
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Shape of a CitiBike timestamp; rows that don't match are skipped before the ::timestamp cast
+TRIP_TIMESTAMP_PATTERN = (r'^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])'
+                          r'[ T]([01]\d|2[0-3]):[0-5]\d:[0-5]\d(\.\d{1,6})?$')
+
 def create_tables(engine):
     """Create necessary tables if they don't exist"""
     logger.info("🏗️ Creating tables...")
     
     with engine.connect() as conn:
-        # Create stations table
-        conn.execute(text("""
+        # Create stations and trips tables in a single round-trip
+        conn.exec_driver_sql("""
             CREATE TABLE IF NOT EXISTS stations (
                 id SERIAL PRIMARY KEY,
                 station_id VARCHAR(50) UNIQUE NOT NULL,
                 name VARCHAR(255) NOT NULL,
                 latitude DECIMAL(10, 8) NOT NULL,
                 longitude DECIMAL(11, 8) NOT NULL
-            )
-        """))
-        
-        # Create trips table
-        conn.execute(text("""
+            );
             CREATE TABLE IF NOT EXISTS trips (
                 id SERIAL PRIMARY KEY,
                 bike_id VARCHAR(50) NOT NULL,
@@ -44,8 +46,8 @@ def create_tables(engine):
                 end_station_id VARCHAR(50) NOT NULL,
                 started_at TIMESTAMP,
                 ended_at TIMESTAMP
-            )
-        """))
+            );
+        """)
         
         conn.commit()
         logger.info("✅ Tables created")
@@ -55,13 +57,12 @@ def clear_existing_data(engine):
     logger.info("🧹 Clearing existing data...")
     
     with engine.connect() as conn:
-        conn.execute(text("DELETE FROM trips"))
-        conn.execute(text("DELETE FROM stations"))
+        conn.execute(text("TRUNCATE TABLE trips, stations RESTART IDENTITY CASCADE"))
         conn.commit()
         logger.info("✅ Existing data cleared")
 
 def load_stations_optimized(engine):
-    """Load station data using bulk insert"""
+    """Load station data with a single execute_values INSERT"""
     logger.info("🏪 Loading station data...")
     
     stations_file = "../data/citibike_data/stations.json"
@@ -75,29 +76,29 @@ def load_stations_optimized(engine):
     stations = stations_data.get('data', {}).get('stations', [])
     logger.info(f"📊 Found {len(stations)} stations")
     
-    # Prepare data for bulk insert
-    station_records = []
-    for station in stations:
-        station_records.append({
-            'station_id': station['station_id'],
-            'name': station['name'],
-            'latitude': station['lat'],
-            'longitude': station['lon']
-        })
-    
-    # Bulk insert using pandas to_sql
-    df_stations = pd.DataFrame(station_records)
+    # Prepare rows as plain tuples; no DataFrame needed for ~2K stations
+    station_records = [(s['station_id'], s['name'], s['lat'], s['lon']) for s in stations]
     
-    with engine.connect() as conn:
-        # Use if_exists='append' to handle duplicates gracefully
-        df_stations.to_sql('stations', conn, if_exists='append', index=False, method='multi')
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        # One INSERT with a VALUES list per page; ON CONFLICT handles duplicates gracefully
+        execute_values(
+            cursor,
+            "INSERT INTO stations (station_id, name, latitude, longitude) VALUES %s ON CONFLICT DO NOTHING",
+            station_records,
+            page_size=1000
+        )
         conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
     
     logger.info(f"✅ Successfully loaded {len(station_records)} stations")
     return True
 
 def load_trips_optimized(engine):
-    """Load trip data using optimized bulk inserts"""
+    """Stream trip data from the zip archive straight into PostgreSQL with COPY"""
     logger.info("🚲 Loading trip data...")
     
     trip_file = "../data/citibike_data/202503-citibike-tripdata.csv.zip"
@@ -105,65 +106,54 @@ def load_trips_optimized(engine):
         logger.error(f"❌ Trip data file not found: {trip_file}")
         return False
     
-    # Read the CSV file from zip
+    start_time = time.time()
+    
+    # Read the CSV file from zip without materialising it in pandas
     with zipfile.ZipFile(trip_file, 'r') as zip_ref:
         csv_filename = zip_ref.namelist()[0]
-        with zip_ref.open(csv_filename) as csv_file:
-            # Much larger chunks for better performance
-            chunk_size = 10000  # Increased from 500
-            total_trips = 0
-            chunk_count = 0
-            start_time = time.time()
+        with zip_ref.open(csv_filename) as raw_file:
+            csv_file = io.TextIOWrapper(raw_file, encoding='utf-8-sig', newline='')
+            
+            # The source CSV carries more columns than trips, so COPY it as-is into a
+            # staging table built from its header and let the server pick and cast columns
+            header = next(csv.reader([csv_file.readline()]))
+            staging_columns = sql.SQL(', ').join(
+                sql.SQL('{} TEXT').format(sql.Identifier(column)) for column in header
+            )
             
-            for chunk in pd.read_csv(csv_file, chunksize=chunk_size):
-                chunk_count += 1
-                chunk_start_time = time.time()
+            conn = engine.raw_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(sql.SQL("CREATE TEMP TABLE trips_staging ({}) ON COMMIT DROP").format(staging_columns))
+                cursor.copy_expert("COPY trips_staging FROM STDIN WITH (FORMAT csv)", csv_file)
+                logger.info(f"📥 Streamed CSV into staging in {time.time() - start_time:.1f}s")
                 
-                # Process chunk efficiently
-                try:
-                    # Clean and prepare the data
-                    chunk_clean = chunk.copy()
-                    
-                    # Map column names and handle missing values
-                    chunk_clean['bike_id'] = chunk_clean.get('ride_id', 'unknown').astype(str)
-                    chunk_clean['start_station_id'] = chunk_clean.get('start_station_id', '').astype(str)
-                    chunk_clean['end_station_id'] = chunk_clean.get('end_station_id', '').astype(str)
-                    chunk_clean['started_at'] = pd.to_datetime(chunk_clean.get('started_at', ''), errors='coerce')
-                    chunk_clean['ended_at'] = pd.to_datetime(chunk_clean.get('ended_at', ''), errors='coerce')
-                    
-                    # Remove rows with invalid timestamps
-                    chunk_clean = chunk_clean.dropna(subset=['started_at', 'ended_at'])
-                    
-                    if len(chunk_clean) == 0:
-                        continue
-                    
-                    # Select only the columns we need
-                    chunk_clean = chunk_clean[['bike_id', 'start_station_id', 'end_station_id', 'started_at', 'ended_at']]
-                    
-                    # Bulk insert using pandas to_sql with optimized method
-                    with engine.connect() as conn:
-                        chunk_clean.to_sql('trips', conn, if_exists='append', index=False, method='multi')
-                        conn.commit()
-                    
-                    chunk_trips = len(chunk_clean)
-                    total_trips += chunk_trips
-                    chunk_time = time.time() - chunk_start_time
-                    
-                    # Progress reporting with performance metrics
-                    if chunk_count % 5 == 0:  # Report every 5 chunks instead of 10
-                        elapsed_time = time.time() - start_time
-                        trips_per_second = total_trips / elapsed_time if elapsed_time > 0 else 0
-                        logger.info(f"✅ Processed {total_trips:,} trips (chunk {chunk_count}) - "
-                                  f"{chunk_trips:,} in {chunk_time:.1f}s - "
-                                  f"Rate: {trips_per_second:.0f} trips/sec")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing chunk {chunk_count}: {e}")
-                    continue
+                # Rows with empty or malformed timestamps are filtered out rather than failing the
+                # cast, so one bad row can't roll back the whole load (as the old pandas coercion did)
+                cursor.execute("""
+                    INSERT INTO trips (bike_id, start_station_id, end_station_id, started_at, ended_at)
+                    SELECT 
+                        COALESCE(ride_id, 'unknown'),
+                        COALESCE(start_station_id, ''),
+                        COALESCE(end_station_id, ''),
+                        started_at::timestamp,
+                        ended_at::timestamp
+                    FROM trips_staging
+                    WHERE started_at ~ %(pattern)s AND ended_at ~ %(pattern)s
+                """, {'pattern': TRIP_TIMESTAMP_PATTERN})
+                total_trips = cursor.rowcount
+                cursor.execute("SELECT COUNT(*) FROM trips_staging")
+                skipped_trips = cursor.fetchone()[0] - total_trips
+                conn.commit()
+                cursor.close()
+            finally:
+                conn.close()
     
     total_time = time.time() - start_time
     avg_rate = total_trips / total_time if total_time > 0 else 0
     logger.info(f"✅ Successfully loaded {total_trips:,} trips in {total_time:.1f}s")
+    if skipped_trips:
+        logger.warning(f"⚠️ Skipped {skipped_trips:,} rows with missing or malformed timestamps")
     logger.info(f"📊 Average rate: {avg_rate:.0f} trips/second")
     return True
 
@@ -172,9 +162,11 @@ def verify_data(engine):
     logger.info("🔍 Verifying loaded data...")
     
     with engine.connect() as conn:
-        station_count = conn.execute(text("SELECT COUNT(*) FROM stations")).scalar()
-        trip_count = conn.execute(text("SELECT COUNT(*) FROM trips")).scalar()
-        unique_bikes = conn.execute(text("SELECT COUNT(DISTINCT bike_id) FROM trips")).scalar()
+        # One round-trip and a single pass over trips for all three numbers
+        station_count, trip_count, unique_bikes = conn.execute(text("""
+            SELECT (SELECT COUNT(*) FROM stations), COUNT(*), COUNT(DISTINCT bike_id)
+            FROM trips
+        """)).fetchone()
     
     logger.info(f"📊 Final database statistics:")
     logger.info(f"  Stations: {station_count:,}")
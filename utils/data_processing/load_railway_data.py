@@ -73,8 +73,7 @@ def load_data_to_railway_postgres():
         # Clear existing data
         with engine.connect() as conn:
             logger.info("🧹 Clearing existing data...")
-            conn.execute(text("DELETE FROM trips"))
-            conn.execute(text("DELETE FROM stations"))
+            conn.execute(text("TRUNCATE TABLE trips, stations RESTART IDENTITY CASCADE"))
             conn.commit()
             logger.info("✅ Existing data cleared")
         
@@ -5,6 +5,8 @@ Data Migration Script: SQLite to PostgreSQL
 This script migrates data from the existing SQLite database to the new PostgreSQL database.
 """
 
+import csv
+import io
 import os
 import sys
 import logging
@@ -13,6 +15,11 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
+from load_full_dataset import (
+    SCHEMA_DDL, copy_df, create_load_engine, disable_synchronous_commit,
+    drop_trip_indexes, restore_trip_indexes, set_trips_logged
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,6 +28,8 @@ def migrate_data_from_sqlite():
     """Migrate data from SQLite to PostgreSQL using fast bulk operations"""
     logger.info("🔄 Migrating data from SQLite to PostgreSQL...")
     
+    pg_conn = None
+    sqlite_conn = None
     try:
         # Connect to SQLite database
         sqlite_url = "sqlite:///./dev.db"
@@ -33,36 +42,81 @@ def migrate_data_from_sqlite():
             logger.error("❌ DATABASE_URL not set in environment")
             return False
             
-        postgres_engine = create_engine(postgres_url)
+        postgres_engine = create_load_engine(postgres_url)
         
-        # Clear existing data in PostgreSQL
+        # Make sure the schema exists, then clear existing data in PostgreSQL
         with postgres_engine.connect() as conn:
-            conn.execute(text("DELETE FROM trips"))
-            conn.execute(text("DELETE FROM stations"))
-            conn.execute(text("DELETE FROM station_mapping"))
+            conn.exec_driver_sql(SCHEMA_DDL + """
+                CREATE TABLE IF NOT EXISTS station_mapping (
+                    uuid_station_id VARCHAR(50) PRIMARY KEY,
+                    numeric_station_id VARCHAR(50) NOT NULL,
+                    station_name VARCHAR(255) NOT NULL
+                );
+            """)
+            conn.execute(text("TRUNCATE TABLE trips, stations, station_mapping RESTART IDENTITY CASCADE"))
             conn.commit()
             logger.info("🧹 Cleared existing PostgreSQL data")
         
-        # Migrate stations using pandas bulk insert
+        # Raw psycopg2 connection for COPY FROM STDIN
+        pg_conn = postgres_engine.raw_connection()
+        
+        # Migrate stations using COPY
         logger.info("📊 Migrating stations...")
         stations_df = pd.read_sql("SELECT station_id, name, latitude, longitude FROM stations", sqlite_engine)
         if not stations_df.empty:
-            stations_df.to_sql('stations', postgres_engine, if_exists='append', index=False, method='multi')
+            disable_synchronous_commit(pg_conn)
+            copy_df(stations_df, pg_conn, 'stations', ['station_id', 'name', 'latitude', 'longitude'])
             logger.info(f"✅ Migrated {len(stations_df)} stations")
         
-        # Migrate trips using pandas bulk insert with chunking
+        # Migrate trips by streaming SQLite rows straight into COPY, without DataFrames
+        # No up-front COUNT(*) over the source table; progress is logged per batch instead
         logger.info("🚲 Migrating trips...")
-        trip_count = pd.read_sql("SELECT COUNT(*) as count FROM trips", sqlite_engine).iloc[0]['count']
-        logger.info(f"🔄 Migrating {trip_count:,} trips...")
         
         # Use larger chunks for better performance
         chunk_size = 50000
         total_migrated = 0
         
-        for chunk_num, chunk_df in enumerate(pd.read_sql("SELECT bike_id, start_station_id, end_station_id, started_at, ended_at FROM trips", sqlite_engine, chunksize=chunk_size)):
-            chunk_df.to_sql('trips', postgres_engine, if_exists='append', index=False, method='multi')
-            total_migrated += len(chunk_df)
-            logger.info(f"   Migrated {total_migrated:,} trips...")
+        primary_key, index_defs = None, []
+        try:
+            # Index maintenance dominates bulk insert cost, so build indexes once after the load
+            primary_key, index_defs = drop_trip_indexes(postgres_engine)
+            set_trips_logged(postgres_engine, False)
+            sqlite_conn = sqlite_engine.raw_connection()
+            sqlite_cursor = sqlite_conn.cursor()
+            sqlite_cursor.arraysize = chunk_size
+            sqlite_cursor.execute("SELECT bike_id, start_station_id, end_station_id, started_at, ended_at FROM trips")
+            pg_cursor = pg_conn.cursor()
+            # One COPY buffer for every batch, reset in place
+            buf = io.StringIO()
+            
+            while True:
+                rows = sqlite_cursor.fetchmany()
+                if not rows:
+                    break
+                
+                buf.seek(0)
+                buf.truncate(0)
+                # NULLs go out as \N so COPY keeps them NULL instead of empty strings
+                csv.writer(buf).writerows(
+                    tuple('\\N' if value is None else value for value in row) for row in rows
+                )
+                buf.seek(0)
+                disable_synchronous_commit(pg_conn)
+                pg_cursor.copy_expert(
+                    "COPY trips (bike_id, start_station_id, end_station_id, started_at, ended_at) FROM STDIN WITH CSV NULL '\\N'",
+                    buf
+                )
+                pg_conn.commit()
+                
+                total_migrated += len(rows)
+                logger.info(f"   Migrated {total_migrated:,} trips...")
+            
+            pg_cursor.close()
+        finally:
+            # A failed COPY leaves its transaction holding a lock that ALTER TABLE would wait on
+            pg_conn.rollback()
+            set_trips_logged(postgres_engine, True)
+            restore_trip_indexes(postgres_engine, primary_key, index_defs)
         
         logger.info(f"✅ Migrated {total_migrated:,} trips total")
         
@@ -73,7 +127,7 @@ def migrate_data_from_sqlite():
             with open(stations_json_path, 'r') as f:
                 stations_data = json.load(f)
             
-            # Convert to DataFrame for bulk insert
+            # Convert to DataFrame for COPY
             mapping_data = []
             for station in stations_data:
                 # Handle both dict and string formats
@@ -90,7 +144,8 @@ def migrate_data_from_sqlite():
             
             if mapping_data:
                 mapping_df = pd.DataFrame(mapping_data)
-                mapping_df.to_sql('station_mapping', postgres_engine, if_exists='append', index=False, method='multi')
+                disable_synchronous_commit(pg_conn)
+                copy_df(mapping_df, pg_conn, 'station_mapping', ['uuid_station_id', 'numeric_station_id', 'station_name'])
                 logger.info(f"✅ Created station mapping for {len(mapping_data)} stations")
             else:
                 logger.warning("⚠️ No valid station mapping data found")
@@ -102,6 +157,11 @@ def migrate_data_from_sqlite():
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
         return False
+    finally:
+        if sqlite_conn is not None:
+            sqlite_conn.close()
+        if pg_conn is not None:
+            pg_conn.close()
 
 def verify_migration(engine):
     """Verify the migration was successful"""
@@ -109,27 +169,23 @@ def verify_migration(engine):
     
     try:
         with engine.connect() as conn:
-            # Check station count
-            station_count = conn.execute(text("SELECT COUNT(*) FROM stations")).scalar()
-            logger.info(f"📊 Stations: {station_count:,}")
+            # Counts and date range in one round-trip; MIN/MAX already skip NULL started_at
+            station_count, mapping_count, trip_count, min_date, max_date = conn.execute(text("""
+                SELECT 
+                    (SELECT COUNT(*) FROM stations),
+                    (SELECT COUNT(*) FROM station_mapping),
+                    COUNT(*),
+                    MIN(started_at),
+                    MAX(started_at)
+                FROM trips
+            """)).fetchone()
             
-            # Check trip count
-            trip_count = conn.execute(text("SELECT COUNT(*) FROM trips")).scalar()
+            logger.info(f"📊 Stations: {station_count:,}")
             logger.info(f"🚲 Trips: {trip_count:,}")
-            
-            # Check mapping count
-            mapping_count = conn.execute(text("SELECT COUNT(*) FROM station_mapping")).scalar()
             logger.info(f"🗺️ Station mappings: {mapping_count:,}")
             
-            # Check date range
-            date_result = conn.execute(text("""
-                SELECT MIN(started_at), MAX(started_at) 
-                FROM trips 
-                WHERE started_at IS NOT NULL
-            """)).fetchone()
-            
-            if date_result and date_result[0]:
-                logger.info(f"📅 Date range: {date_result[0]} to {date_result[1]}")
+            if min_date:
+                logger.info(f"📅 Date range: {min_date} to {max_date}")
             
             logger.info("✅ Migration verification complete")
             return True
@@ -4,11 +4,12 @@ Script to populate the station_mapping table with data from stations.json
 This maps UUID station IDs to numeric IDs and station names for the probability calculations.
 """
 
-import json
+import csv
+import io
 import os
 import sys
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import ijson
+from sqlalchemy import create_engine, make_url, text
 from dotenv import load_dotenv
 import logging
 
@@ -20,8 +21,14 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql:///dev")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Batched executemany so any multi-row INSERT through the engine is sent as paged VALUES lists;
+# both it and copy_expert need psycopg2, so request that driver explicitly
+engine = create_engine(
+    make_url(DATABASE_URL).set(drivername='postgresql+psycopg2'),
+    executemany_mode='values_plus_batch',
+    insertmanyvalues_page_size=1000,
+    executemany_batch_page_size=500,
+)
 
 def populate_station_mapping():
     """Populate the station_mapping table with data from stations.json"""
@@ -34,80 +41,74 @@ def populate_station_mapping():
         return False
     
     try:
-        # Load stations data
+        # Stream stations straight into the COPY buffer; only data.stations is parsed
         logger.info(f"Loading stations data from {stations_file}")
-        with open(stations_file, 'r') as f:
-            data = json.load(f)
-        
-        stations = data.get('data', {}).get('stations', [])
-        logger.info(f"Found {len(stations)} stations in JSON file")
-        
-        # Create database session
-        db = SessionLocal()
-        
-        # Clear existing mapping data
-        logger.info("Clearing existing station mapping data")
-        db.execute(text("DELETE FROM station_mapping"))
-        db.commit()
-        
-        # Prepare mapping data
-        mapping_data = []
-        for station in stations:
-            station_id = station.get('station_id')
-            short_name = station.get('short_name')
-            name = station.get('name')
-            
-            if station_id and short_name and name:
-                mapping_data.append({
-                    'uuid_station_id': station_id,
-                    'numeric_station_id': short_name,
-                    'station_name': name
-                })
-        
-        logger.info(f"Prepared {len(mapping_data)} station mappings")
-        
-        # Insert mapping data in batches
-        batch_size = 1000
-        for i in range(0, len(mapping_data), batch_size):
-            batch = mapping_data[i:i + batch_size]
-            
-            # Create values string for bulk insert
-            values = []
-            for item in batch:
-                # Escape single quotes in station names
-                escaped_name = item['station_name'].replace("'", "''")
-                values.append(f"('{item['uuid_station_id']}', '{item['numeric_station_id']}', '{escaped_name}')")
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        station_count = 0
+        mapping_count = 0
+        with open(stations_file, 'rb') as f:
+            # Numbers come back as floats rather than Decimals; none of them are kept
+            for station in ijson.items(f, 'data.stations.item', use_float=True):
+                station_count += 1
+                station_id = station.get('station_id')
+                short_name = station.get('short_name')
+                name = station.get('name')
+                
+                if station_id and short_name and name:
+                    writer.writerow((station_id, short_name, name))
+                    mapping_count += 1
+        buf.seek(0)
+        
+        logger.info(f"Found {station_count} stations in JSON file")
+        
+        logger.info(f"Prepared {mapping_count} station mappings")
+        
+        raw_conn = engine.raw_connection()
+        try:
+            cursor = raw_conn.cursor()
             
-            values_str = ', '.join(values)
+            # Clear existing mapping data
+            logger.info("Clearing existing station mapping data")
+            cursor.execute("TRUNCATE TABLE station_mapping")
             
-            # Execute bulk insert
-            insert_query = text(f"""
+            # COPY everything into a staging table in one stream, then upsert with a single statement
+            cursor.execute("CREATE TEMP TABLE station_mapping_stage (LIKE station_mapping) ON COMMIT DROP")
+            cursor.copy_expert(
+                "COPY station_mapping_stage (uuid_station_id, numeric_station_id, station_name) FROM STDIN WITH (FORMAT csv)",
+                buf
+            )
+            # DISTINCT ON keeps duplicate UUIDs in the JSON from hitting the same row twice
+            cursor.execute("""
                 INSERT INTO station_mapping (uuid_station_id, numeric_station_id, station_name)
-                VALUES {values_str}
+                SELECT DISTINCT ON (uuid_station_id) uuid_station_id, numeric_station_id, station_name
+                FROM station_mapping_stage
                 ON CONFLICT (uuid_station_id) DO UPDATE SET
                     numeric_station_id = EXCLUDED.numeric_station_id,
                     station_name = EXCLUDED.station_name
             """)
             
-            db.execute(insert_query)
-            logger.info(f"Inserted batch {i//batch_size + 1}/{(len(mapping_data) + batch_size - 1)//batch_size}")
-        
-        # Commit all changes
-        db.commit()
-        
-        # Verify the data was inserted
-        result = db.execute(text("SELECT COUNT(*) FROM station_mapping"))
-        count = result.scalar()
-        logger.info(f"Successfully populated station_mapping table with {count} records")
+            # Commit all changes
+            raw_conn.commit()
+            cursor.close()
+        finally:
+            raw_conn.close()
+        
+        # Plain Core connection for the read-only checks; no ORM objects are involved
+        with engine.connect() as conn:
+            # Verify the data was inserted
+            result = conn.execute(text("SELECT COUNT(*) FROM station_mapping"))
+            count = result.scalar()
+            logger.info(f"Successfully populated station_mapping table with {count} records")
+            
+            # Show some sample mappings
+            result = conn.execute(text("SELECT * FROM station_mapping LIMIT 5"))
+            sample_mappings = result.fetchall()
         
-        # Show some sample mappings
-        result = db.execute(text("SELECT * FROM station_mapping LIMIT 5"))
-        sample_mappings = result.fetchall()
         logger.info("Sample mappings:")
         for mapping in sample_mappings:
             logger.info(f"  UUID: {mapping[0]}, Numeric: {mapping[1]}, Name: {mapping[2]}")
         
-        db.close()
         return True
         
     except Exception as e:
@@ -119,8 +120,6 @@ def populate_station_mapping():
 def verify_mapping():
     """Verify that the mapping table works correctly with the trips table"""
     try:
-        db = SessionLocal()
-        
         # Test a join query
         query = text("""
             SELECT 
@@ -135,14 +134,14 @@ def verify_mapping():
             LIMIT 10
         """)
         
-        result = db.execute(query)
-        mappings = result.fetchall()
+        with engine.connect() as conn:
+            result = conn.execute(query)
+            mappings = result.fetchall()
         
         logger.info("Top 10 stations by trip count (using mapping):")
         for mapping in mappings:
             logger.info(f"  {mapping[0]} (UUID: {mapping[1]}, Numeric: {mapping[2]}) - {mapping[3]} trips")
         
-        db.close()
         return True
         
     except Exception as e:
@@ -16,6 +16,7 @@ This script is designed to be run once to set up the entire development environm
 It includes checks for existing installations to avoid unnecessary reinstallation.
 """
 
+import hashlib
 import os
 import sys
 import logging
@@ -23,6 +24,13 @@ import subprocess
 import time
 import signal
 import json
+import socket
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -37,6 +45,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# (label, version command, install hint) for each required tool
+PREREQUISITES = [
+    ('Python', ['python', '--version'], None),
+    ('Node.js', ['node', '--version'], None),
+    ('npm', ['npm', '--version'], None),
+    ('PostgreSQL', ['psql', '--version'], 'brew install postgresql'),
+]
+
 class LocalDevSetup:
     """Comprehensive local development environment setup"""
     
@@ -46,6 +62,7 @@ class LocalDevSetup:
         self.frontend_dir = self.project_root / "frontend"
         self.setup_success = True
         self.processes = []
+        self.engine = None
         
     def log_section(self, title: str):
         """Log a section header"""
@@ -57,85 +74,96 @@ class LocalDevSetup:
         """Check if all prerequisites are installed"""
         self.log_section("Checking Prerequisites")
         
-        # Check Python
-        try:
-            result = subprocess.run(['python', '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info(f"✅ Python found: {result.stdout.strip()}")
-            else:
-                logger.error("❌ Python not found or not working")
-                return False
-        except FileNotFoundError:
-            logger.error("❌ Python not installed")
-            return False
-        
-        # Check Node.js
-        try:
-            result = subprocess.run(['node', '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info(f"✅ Node.js found: {result.stdout.strip()}")
-            else:
-                logger.error("❌ Node.js not found or not working")
-                return False
-        except FileNotFoundError:
-            logger.error("❌ Node.js not installed")
-            return False
-        
-        # Check npm
-        try:
-            result = subprocess.run(['npm', '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info(f"✅ npm found: {result.stdout.strip()}")
-            else:
-                logger.error("❌ npm not found or not working")
-                return False
-        except FileNotFoundError:
-            logger.error("❌ npm not installed")
-            return False
+        # The version probes are independent, so run them all at once and report in order
+        with ThreadPoolExecutor(max_workers=len(PREREQUISITES)) as executor:
+            futures = [
+                executor.submit(subprocess.run, argv, capture_output=True, text=True)
+                for _, argv, _ in PREREQUISITES
+            ]
         
-        # Check PostgreSQL
-        try:
-            result = subprocess.run(['psql', '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info(f"✅ PostgreSQL found: {result.stdout.strip()}")
-            else:
-                logger.error("❌ PostgreSQL not found")
-                return False
-        except FileNotFoundError:
-            logger.error("❌ PostgreSQL not installed")
-            logger.info("💡 Install with: brew install postgresql")
-            return False
+        # Log every probe before failing so one run shows everything that's missing
+        all_found = True
+        for (label, _, install_hint), future in zip(PREREQUISITES, futures):
+            try:
+                result = future.result()
+                if result.returncode == 0:
+                    logger.info(f"✅ {label} found: {result.stdout.strip()}")
+                else:
+                    logger.error(f"❌ {label} not found or not working")
+                    all_found = False
+            except FileNotFoundError:
+                logger.error(f"❌ {label} not installed")
+                if install_hint:
+                    logger.info(f"💡 Install with: {install_hint}")
+                all_found = False
         
-        return True
+        return all_found
+    
+    @cached_property
+    def _brew_services(self) -> Dict[str, str]:
+        """Homebrew services by name -> status, from one `brew services list` call"""
+        result = subprocess.run(['brew', 'services', 'list'], capture_output=True, text=True)
+        services = {}
+        for line in result.stdout.splitlines()[1:]:  # skip the Name/Status header
+            fields = line.split()
+            if len(fields) >= 2:
+                services[fields[0]] = fields[1]
+        return services
+    
+    def _reap(self, process: subprocess.Popen) -> None:
+        """Kill a background probe if it is still running and collect its exit status and pipes"""
+        if process.poll() is None:
+            process.kill()
+        process.communicate()
     
     def setup_postgresql(self) -> bool:
         """Set up PostgreSQL database and tables"""
         self.log_section("Setting up PostgreSQL Database")
         
-        # Check if PostgreSQL service is running
+        # Check if PostgreSQL service is running, listing databases in the background meanwhile
+        database_probe = None
         try:
-            result = subprocess.run(['brew', 'services', 'list'], capture_output=True, text=True)
-            if 'postgresql' in result.stdout and 'started' in result.stdout:
+            try:
+                database_probe = subprocess.Popen(['psql', '-l'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                brew_services = self._brew_services
+            except FileNotFoundError as e:
+                missing = 'Homebrew' if e.filename == 'brew' else e.filename
+                logger.error(f"❌ {missing} not found. Please install PostgreSQL manually.")
+                return False
+            
+            # Match the formula by name (postgresql or a versioned postgresql@N), not anywhere in the output
+            postgres_started = any(
+                name.split('@')[0] == 'postgresql' and status == 'started'
+                for name, status in brew_services.items()
+            )
+            if postgres_started:
                 logger.info("✅ PostgreSQL service is already running")
             else:
                 logger.info("🔄 Starting PostgreSQL service...")
-                result = subprocess.run(['brew', 'services', 'start', 'postgresql'], capture_output=True, text=True)
+                result = subprocess.run(['brew', 'services', 'start', 'postgresql'], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
                 if result.returncode != 0:
                     logger.error(f"❌ Failed to start PostgreSQL: {result.stderr}")
                     return False
                 logger.info("✅ PostgreSQL service started")
-        except FileNotFoundError:
-            logger.error("❌ Homebrew not found. Please install PostgreSQL manually.")
-            return False
+                self.__dict__.pop('_brew_services', None)
+                
+                # The overlapped listing ran against a stopped server; list again now it's up
+                self._reap(database_probe)
+                database_probe = subprocess.Popen(['psql', '-l'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            
+            database_stdout, _ = database_probe.communicate()
+        finally:
+            # Early returns and errors must not leave the listing running or unreaped
+            if database_probe is not None:
+                self._reap(database_probe)
         
         # Check if dev database exists
         try:
-            result = subprocess.run(['psql', '-l'], capture_output=True, text=True)
-            if 'dev' in result.stdout:
+            if 'dev' in database_stdout:
                 logger.info("✅ Database 'dev' already exists")
             else:
                 logger.info("🔄 Creating database 'dev'...")
-                result = subprocess.run(['createdb', 'dev'], capture_output=True, text=True)
+                result = subprocess.run(['createdb', 'dev'], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
                 if result.returncode != 0 and 'already exists' not in result.stderr:
                     logger.error(f"❌ Failed to create database: {result.stderr}")
                     return False
@@ -150,13 +178,18 @@ class LocalDevSetup:
             if 'stations' in result.stdout and 'trips' in result.stdout and 'station_mapping' in result.stdout:
                 logger.info("✅ All required tables already exist")
                 
-                # Check data counts
-                result = subprocess.run(['psql', '-d', 'dev', '-c', 'SELECT COUNT(*) FROM stations;'], capture_output=True, text=True)
-                station_count = result.stdout.strip().split('\n')[-2] if result.returncode == 0 else 'unknown'
-                logger.info(f"📊 Stations in database: {station_count}")
+                # Check data counts over one connection instead of a psql process per query
+                from sqlalchemy import text
                 
-                result = subprocess.run(['psql', '-d', 'dev', '-c', 'SELECT COUNT(*) FROM trips;'], capture_output=True, text=True)
-                trip_count = result.stdout.strip().split('\n')[-2] if result.returncode == 0 else 'unknown'
+                try:
+                    with self._get_engine().connect() as conn:
+                        station_count, trip_count = conn.execute(text(
+                            "SELECT (SELECT COUNT(*) FROM stations), (SELECT COUNT(*) FROM trips)"
+                        )).one()
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not count rows: {e}")
+                    station_count = trip_count = 'unknown'
+                logger.info(f"📊 Stations in database: {station_count}")
                 logger.info(f"📊 Trips in database: {trip_count}")
                 
                 return True
@@ -167,33 +200,35 @@ class LocalDevSetup:
             logger.error(f"❌ Error checking tables: {e}")
             return False
     
-    def create_database_tables(self) -> bool:
-        """Create database tables if they don't exist"""
-        try:
+    def _get_engine(self):
+        """Create the local dev database engine on first use and reuse it afterwards"""
+        if self.engine is None:
             # Get current user for database connection
             import getpass
             current_user = getpass.getuser()
             database_url = f"postgresql://{current_user}@localhost:5432/dev"
             
-            # Import SQLAlchemy for table creation
-            from sqlalchemy import create_engine, text
+            # Import SQLAlchemy lazily; it's only needed once PostgreSQL is up
+            from sqlalchemy import create_engine
             
-            engine = create_engine(database_url)
-            
-            with engine.connect() as conn:
-                # Create stations table
-                conn.execute(text("""
+            # Shared by the table checks, table creation and final verification
+            self.engine = create_engine(database_url, pool_size=5, max_overflow=0, pool_pre_ping=True)
+        return self.engine
+    
+    def create_database_tables(self) -> bool:
+        """Create database tables if they don't exist"""
+        try:
+            # All tables and indexes go out as one script in one transaction
+            with self._get_engine().begin() as conn:
+                conn.exec_driver_sql("""
                     CREATE TABLE IF NOT EXISTS stations (
                         id SERIAL PRIMARY KEY,
                         station_id VARCHAR(50) UNIQUE NOT NULL,
                         name VARCHAR(255) NOT NULL,
                         latitude DECIMAL(10, 8) NOT NULL,
                         longitude DECIMAL(11, 8) NOT NULL
-                    )
-                """))
-                
-                # Create trips table
-                conn.execute(text("""
+                    );
+                    
                     CREATE TABLE IF NOT EXISTS trips (
                         id SERIAL PRIMARY KEY,
                         bike_id VARCHAR(50) NOT NULL,
@@ -201,25 +236,20 @@ class LocalDevSetup:
                         end_station_id VARCHAR(50) NOT NULL,
                         started_at TIMESTAMP,
                         ended_at TIMESTAMP
-                    )
-                """))
-                
-                # Create station_mapping table
-                conn.execute(text("""
+                    );
+                    
                     CREATE TABLE IF NOT EXISTS station_mapping (
                         uuid_station_id VARCHAR(50) PRIMARY KEY,
                         numeric_station_id VARCHAR(50) NOT NULL,
                         station_name VARCHAR(255) NOT NULL
-                    )
-                """))
-                
-                # Create indexes
-                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_trips_bike_id ON trips(bike_id)"))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_trips_stations ON trips(start_station_id, end_station_id)"))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_trips_time ON trips(started_at)"))
-                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_station_mapping_numeric ON station_mapping(numeric_station_id)"))
+                    );
+                    
+                    CREATE INDEX IF NOT EXISTS idx_trips_bike_id ON trips(bike_id);
+                    CREATE INDEX IF NOT EXISTS idx_trips_stations ON trips(start_station_id, end_station_id);
+                    CREATE INDEX IF NOT EXISTS idx_trips_time ON trips(started_at);
+                    CREATE INDEX IF NOT EXISTS idx_station_mapping_numeric ON station_mapping(numeric_station_id);
+                """)
                 
-                conn.commit()
                 logger.info("✅ Database tables and indexes created successfully")
                 return True
                 
@@ -263,6 +293,30 @@ LOG_LEVEL=INFO
             logger.error(f"❌ Failed to create .env file: {e}")
             return False
     
+    def _file_hash(self, path: Path) -> Optional[str]:
+        """SHA-256 of a dependency manifest, used to tell whether an install is stale (None if missing)"""
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except FileNotFoundError:
+            return None
+    
+    def _install_is_current(self, manifest_hash: Optional[str], sentinel: Path) -> bool:
+        """Check whether the last successful install recorded this manifest hash"""
+        # No manifest means nothing to match; let the installer run and report the problem
+        if manifest_hash is None:
+            return False
+        return sentinel.exists() and sentinel.read_text().strip() == manifest_hash
+    
+    def _run_streamed(self, argv: List[str], cwd: Path, tail_lines: int = 20) -> Tuple[int, str]:
+        """Run an installer, logging its output line by line and keeping only the tail for error reports"""
+        tail = deque(maxlen=tail_lines)
+        with subprocess.Popen(argv, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) as process:
+            for line in process.stdout:
+                line = line.rstrip()
+                logger.debug(line)
+                tail.append(line)
+        return process.returncode, '\n'.join(tail)
+    
     def setup_backend(self) -> bool:
         """Set up backend Python environment"""
         self.log_section("Setting up Backend Environment")
@@ -272,7 +326,7 @@ LOG_LEVEL=INFO
         if not venv_path.exists():
             logger.info("🔄 Creating Python virtual environment...")
             try:
-                result = subprocess.run(['python', '-m', 'venv', 'venv'], cwd=self.backend_dir, capture_output=True, text=True)
+                result = subprocess.run(['python', '-m', 'venv', 'venv'], cwd=self.backend_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
                 if result.returncode != 0:
                     logger.error(f"❌ Failed to create virtual environment: {result.stderr}")
                     return False
@@ -283,30 +337,24 @@ LOG_LEVEL=INFO
         else:
             logger.info("✅ Virtual environment already exists")
         
-        # Activate virtual environment and install dependencies
+        # Install dependencies with the venv's own pip; no activation needed for subprocesses
         try:
-            # Check if requirements are already installed
-            activate_script = venv_path / "bin" / "activate_this.py"
-            if activate_script.exists():
-                with open(activate_script) as f:
-                    exec(f.read(), {'__file__': str(activate_script)})
-            
-            # Check installed packages
-            result = subprocess.run([
-                str(venv_path / "bin" / "pip"), "list"
-            ], capture_output=True, text=True)
+            # Skip pip entirely when requirements.txt hasn't changed since the last install
+            requirements_hash = self._file_hash(self.backend_dir / "requirements.txt")
+            requirements_sentinel = venv_path / ".requirements.sha256"
             
-            if 'fastapi' in result.stdout and 'uvicorn' in result.stdout:
+            if self._install_is_current(requirements_hash, requirements_sentinel):
                 logger.info("✅ Backend dependencies already installed")
             else:
                 logger.info("🔄 Installing backend dependencies...")
-                result = subprocess.run([
+                returncode, output_tail = self._run_streamed([
                     str(venv_path / "bin" / "pip"), "install", "-r", "requirements.txt"
-                ], cwd=self.backend_dir, capture_output=True, text=True)
+                ], cwd=self.backend_dir)
                 
-                if result.returncode != 0:
-                    logger.error(f"❌ Failed to install dependencies: {result.stderr}")
+                if returncode != 0:
+                    logger.error(f"❌ Failed to install dependencies: {output_tail}")
                     return False
+                requirements_sentinel.write_text(requirements_hash)
                 logger.info("✅ Backend dependencies installed")
             
             return True
@@ -319,18 +367,24 @@ LOG_LEVEL=INFO
         """Set up frontend Node.js environment"""
         self.log_section("Setting up Frontend Environment")
         
-        # Check if node_modules exists
+        # Check node_modules was installed from the current package-lock.json
         node_modules_path = self.frontend_dir / "node_modules"
-        if node_modules_path.exists():
+        lockfile_hash = self._file_hash(self.frontend_dir / "package-lock.json")
+        lockfile_sentinel = node_modules_path / ".pkglock.sha256"
+        if self._install_is_current(lockfile_hash, lockfile_sentinel):
             logger.info("✅ Frontend dependencies already installed")
             return True
         
         logger.info("🔄 Installing frontend dependencies...")
         try:
-            result = subprocess.run(['npm', 'install'], cwd=self.frontend_dir, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"❌ Failed to install frontend dependencies: {result.stderr}")
+            returncode, output_tail = self._run_streamed(['npm', 'install'], cwd=self.frontend_dir)
+            if returncode != 0:
+                logger.error(f"❌ Failed to install frontend dependencies: {output_tail}")
                 return False
+            # npm install may create or rewrite the lockfile, so record the hash it left behind
+            lockfile_hash = self._file_hash(self.frontend_dir / "package-lock.json")
+            if lockfile_hash is not None:
+                lockfile_sentinel.write_text(lockfile_hash)
             logger.info("✅ Frontend dependencies installed")
             return True
         except Exception as e:
@@ -339,12 +393,34 @@ LOG_LEVEL=INFO
     
     def check_service_running(self, port: int) -> bool:
         """Check if a service is already running on a specific port"""
+        # A direct connect answers this without lsof scanning every open file on the system
         try:
-            result = subprocess.run(['lsof', '-i', f':{port}'], capture_output=True, text=True)
-            return result.returncode == 0 and result.stdout.strip() != ''
-        except:
+            with socket.create_connection(('localhost', port), timeout=0.1):
+                return True
+        except OSError:
             return False
     
+    def _wait_http(self, url: str, timeout: float = 30, interval: float = 0.25,
+                   process: Optional[subprocess.Popen] = None) -> bool:
+        """Poll a URL until it answers 200, the timeout passes, or the serving process exits"""
+        parsed = urllib.parse.urlparse(url)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                return False
+            try:
+                # Cheap TCP probe first; only send the HTTP request once the port accepts connections
+                with socket.create_connection((parsed.hostname, parsed.port), timeout=interval):
+                    pass
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return True
+            except OSError:
+                # Connection refused, timeouts and HTTP errors (URLError is an OSError) all mean "not yet"
+                pass
+            time.sleep(interval)
+        return False
+    
     def start_services(self) -> bool:
         """Start backend and frontend services"""
         self.log_section("Starting Development Services")
@@ -366,60 +442,62 @@ LOG_LEVEL=INFO
                     pids = result.stdout.strip().split('\n')
                     for pid in pids:
                         if pid.strip():
-                            subprocess.run(['kill', '-9', pid.strip()], capture_output=True)
-                    time.sleep(2)  # Wait for processes to stop
+                            try:
+                                os.kill(int(pid.strip()), signal.SIGKILL)
+                            except ProcessLookupError:
+                                pass
+                    # Wait until the ports are actually free rather than a fixed two seconds
+                    deadline = time.monotonic() + 2
+                    while time.monotonic() < deadline and any(self.check_service_running(port) for port in (3000, 3001, 8000)):
+                        time.sleep(0.1)
             except:
                 pass
         
-        # Start backend if not running
+        # Launch whichever services are needed back to back, then wait for them together
+        pending = {}
         if not backend_running:
             logger.info("🔄 Starting backend service...")
             try:
                 backend_process = subprocess.Popen([
                     str(self.backend_dir / "venv" / "bin" / "python"), "main.py"
-                ], cwd=self.backend_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                ], cwd=self.backend_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 self.processes.append(backend_process)
-                
-                # Wait for backend to start
-                time.sleep(5)
-                
-                # Test backend
-                result = subprocess.run(['curl', 'http://localhost:8000/api/health'], capture_output=True, text=True)
-                if result.returncode == 0 and 'healthy' in result.stdout:
-                    logger.info("✅ Backend service started successfully")
-                else:
-                    logger.error("❌ Backend service failed to start")
-                    return False
+                pending['Backend'] = ('http://localhost:8000/api/health', backend_process)
             except Exception as e:
                 logger.error(f"❌ Error starting backend: {e}")
                 return False
         else:
             logger.info("✅ Backend service already running")
         
-        # Start frontend if not running
         if not frontend_running:
             logger.info("🔄 Starting frontend service...")
             try:
-                frontend_process = subprocess.Popen(['npm', 'run', 'dev'], cwd=self.frontend_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                # Nothing reads the servers' output, so don't let it fill a pipe and stall them
+                frontend_process = subprocess.Popen(['npm', 'run', 'dev'], cwd=self.frontend_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 self.processes.append(frontend_process)
-                
-                # Wait for frontend to start
-                time.sleep(8)
-                
-                # Test frontend
-                result = subprocess.run(['curl', '-I', 'http://localhost:3000'], capture_output=True, text=True)
-                if result.returncode == 0 and '200 OK' in result.stdout:
-                    logger.info("✅ Frontend service started successfully")
-                else:
-                    logger.error("❌ Frontend service failed to start")
-                    return False
+                pending['Frontend'] = ('http://localhost:3000', frontend_process)
             except Exception as e:
                 logger.error(f"❌ Error starting frontend: {e}")
                 return False
         else:
             logger.info("✅ Frontend service already running")
         
-        return True
+        # Startup time is now the slower of the two services rather than their sum
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            readiness = {
+                label: executor.submit(self._wait_http, url, process=process)
+                for label, (url, process) in pending.items()
+            }
+        
+        all_started = True
+        for label, future in readiness.items():
+            if future.result():
+                logger.info(f"✅ {label} service started successfully")
+            else:
+                logger.error(f"❌ {label} service failed to start")
+                all_started = False
+        
+        return all_started
     
     def verify_setup(self) -> bool:
         """Verify the complete setup"""
@@ -427,44 +505,52 @@ LOG_LEVEL=INFO
         
         # Test backend endpoints
         try:
-            result = subprocess.run(['curl', 'http://localhost:8000/api/health'], capture_output=True, text=True)
-            if result.returncode == 0 and 'healthy' in result.stdout:
+            with urllib.request.urlopen('http://localhost:8000/api/health', timeout=2) as response:
+                health = json.load(response)
+            if health.get('status') == 'healthy':
                 logger.info("✅ Backend health check passed")
             else:
-                logger.error("❌ Backend health check failed")
+                logger.error(f"❌ Backend health check failed: {health}")
                 return False
-        except Exception as e:
-            logger.error(f"❌ Error testing backend: {e}")
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Backend health check failed: {e}")
             return False
         
         # Test frontend - be more flexible since Next.js might return 404 for root
         try:
-            result = subprocess.run(['curl', '-I', 'http://localhost:3000'], capture_output=True, text=True)
-            if result.returncode == 0:
-                if '200 OK' in result.stdout:
-                    logger.info("✅ Frontend is accessible (200 OK)")
-                elif '404 Not Found' in result.stdout and 'Next.js' in result.stdout:
-                    logger.info("✅ Frontend is running (Next.js responding)")
-                elif 'Next.js' in result.stdout:
-                    logger.info("✅ Frontend is running (Next.js detected)")
-                else:
-                    logger.warning(f"⚠️ Frontend response: {result.stdout[:200]}...")
-                    logger.info("✅ Frontend appears to be running")
+            request = urllib.request.Request('http://localhost:3000', method='HEAD')
+            try:
+                with urllib.request.urlopen(request, timeout=2) as response:
+                    status, headers = response.status, response.headers
+            except urllib.error.HTTPError as e:
+                # Any HTTP status still means the dev server is up and answering
+                status, headers = e.code, e.headers
+            
+            powered_by = headers.get('X-Powered-By', '')
+            if status == 200:
+                logger.info("✅ Frontend is accessible (200 OK)")
+            elif status == 404 and 'Next.js' in powered_by:
+                logger.info("✅ Frontend is running (Next.js responding)")
+            elif 'Next.js' in powered_by:
+                logger.info("✅ Frontend is running (Next.js detected)")
             else:
-                logger.error("❌ Frontend is not accessible")
-                return False
-        except Exception as e:
-            logger.error(f"❌ Error testing frontend: {e}")
+                logger.warning(f"⚠️ Frontend response: HTTP {status}")
+                logger.info("✅ Frontend appears to be running")
+        except OSError as e:
+            logger.error(f"❌ Frontend is not accessible: {e}")
             return False
         
-        # Test database connection
+        # Test database connection on the pooled engine (still checks the stations table is readable)
         try:
-            result = subprocess.run(['psql', '-d', 'dev', '-c', 'SELECT COUNT(*) FROM stations;'], capture_output=True, text=True)
-            if result.returncode == 0:
-                logger.info("✅ Database connection verified")
-            else:
-                logger.error("❌ Database connection failed")
-                return False
+            from sqlalchemy import text
+            from sqlalchemy.exc import SQLAlchemyError
+            
+            with self._get_engine().connect() as conn:
+                conn.execute(text("SELECT COUNT(*) FROM stations")).scalar()
+            logger.info("✅ Database connection verified")
+        except SQLAlchemyError as e:
+            logger.error(f"❌ Database connection failed: {e}")
+            return False
         except Exception as e:
             logger.error(f"❌ Error testing database: {e}")
             return False
@@ -533,13 +619,16 @@ LOG_LEVEL=INFO
                 logger.error("❌ Environment file creation failed")
                 return False
             
-            # Step 4: Set up backend
-            if not self.setup_backend():
+            # Steps 4-5: Set up backend and frontend; pip and npm installs are independent, so run them concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                backend_setup = executor.submit(self.setup_backend)
+                frontend_setup = executor.submit(self.setup_frontend)
+            
+            if not backend_setup.result():
                 logger.error("❌ Backend setup failed")
                 return False
             
-            # Step 5: Set up frontend
-            if not self.setup_frontend():
+            if not frontend_setup.result():
                 logger.error("❌ Frontend setup failed")
                 return False
             